@@ -6,8 +6,9 @@ BOT_TOKEN = "YOUR_BOT_TOKEN_HERE"
 
 # Role definitions: list user IDs for managers and sellers
 # Replace with actual Telegram user IDs
-MANAGER_IDS = [123456789]        # <-- replace with actual manager Telegram ID(s)
-SELLER_IDS = [123456789]         # <-- replace with actual seller Telegram ID(s)
+# frozenset gives O(1) membership checks on every menu navigation
+MANAGER_IDS = frozenset([123456789])   # <-- replace with actual manager Telegram ID(s)
+SELLER_IDS = frozenset([123456789])    # <-- replace with actual seller Telegram ID(s)
 
 # Optional: Mapping of user IDs to names for display in reports
 # Add your team members' IDs and names here
@@ -22,6 +23,28 @@ USER_NAMES = {
 # To get group ID: add @userinfobot to your group and send /start
 GROUP_CHAT_ID = -1234567890    # <-- replace with your group chat ID
 
+# Optional: Redis URL for FSM storage (e.g. "redis://localhost:6379/0")
+# When set, conversation state lives in Redis with a TTL instead of bot memory
+REDIS_URL = None
+# Seconds of inactivity after which a user's FSM state/data expire in Redis
+FSM_STATE_TTL = 900
+
+# Number of uvicorn worker processes used by webhook_server.py (the webhook API in its own
+# processes; run the bot with `python main.py --bot-only` alongside it).
+# The Telegram flood limiter is per process: with N workers plus the bot process, the combined
+# send rate can reach (N + 1) x 25 msg/s, so keep this at 1 unless sends are limited elsewhere.
+# Telethon topic discovery only runs in the bot process; webhook workers use the Bot API instead
+WEBHOOK_WORKERS = 1
+
+# Listen backlog (queued, not yet accepted connections) for the webhook server
+WEBHOOK_BACKLOG = 4096
+
+# Logging level (e.g. "INFO" while setting up, "WARNING" in production to skip per-request logs)
+LOG_LEVEL = "INFO"
+
+# Serve the interactive webhook API docs (/docs, /redoc, /openapi.json); disable in production
+ENABLE_API_DOCS = True
+
 # Timezone for scheduling and time display (use Olson timezone string)
 # Common options: "Asia/Tehran", "UTC", "America/New_York", "Europe/London"
 TIMEZONE = "Asia/Tehran"
@@ -2,10 +2,14 @@
 Authentication Handler
 Handles user login via backend API
 """
+import asyncio
 import httpx
+import logging
+import orjson
 import re
+import time
+from collections import OrderedDict, deque
 from aiogram import Router, types, F
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
@@ -13,19 +17,142 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 import config
 from keyboards import main_menu
 
+logger = logging.getLogger(__name__)
+
 router = Router()
 
+# Auth keyboard button texts
+SHARE_PHONE_TEXT = "📱 اشتراک‌گذاری شماره تلفن"
+MANUAL_PHONE_TEXT = "📝 ورود با شماره تلفن"
+
+# Reply texts shared by several handlers (templates are filled with format_map)
+_CODE_SENT_TPL = (
+    "✅ کد تایید برای شماره {phone} ارسال شد.\n\n"
+    "لطفاً کد 6 رقمی دریافتی را وارد کنید:"
+)
+_WELCOME_TPL = "سلام {name} خوش آمدید!"
+_SEND_CODE_FAILED_TEXT = "❌ خطا در ارسال کد تایید. لطفاً دوباره تلاش کنید."
+_USER_NOT_FOUND_TEXT = (
+    "❌ کاربری با این شماره تلفن یافت نشد.\n\n"
+    "لطفاً شماره صحیح خود را وارد کنید یا با پشتیبانی تماس بگیرید."
+)
+_SERVER_ERROR_TEXT = "❌ خطا در ارتباط با سرور. لطفاً دوباره تلاش کنید."
+
+# Strips everything except digits and '+' from user-entered phone numbers
+_NON_DIGIT = re.compile(r'[^\d+]')
+
+# Backend auth endpoints, relative to config.BASE_URL (the shared client's base_url)
+SEND_CODE_PATH = "/bot/auth/send"
+VERIFY_CODE_PATH = "/bot/auth/verify"
+
+# Request bodies are pre-serialized with orjson, so the content type is set explicitly
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Shared HTTP client for backend auth calls (keeps connections alive between requests)
+_client: httpx.AsyncClient | None = None
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared backend HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=config.BASE_URL,
+            # Connecting fails fast so _post_json's retries stay within the user's patience
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            transport=httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_keepalive_connections=20),
+                http2=True
+            )
+        )
+    return _client
+
+async def close_http():
+    """Close the shared backend HTTP client (called on bot shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+# Retry policy for backend calls (the only retry layer; the transport doesn't retry). Send-code
+# and verify are not idempotent (a repeat sends a second SMS or finds the code already used),
+# so only failures where the backend can't have handled the request are retried: connection
+# setup errors and 503/429 responses (a proxy's 502 may come after the backend acted)
+_MAX_ATTEMPTS = 3
+_RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_RETRY_STATUSES = frozenset({429, 503})
+_RETRY_BASE_DELAY = 0.2
+# No new attempt is started once this many seconds have passed since the first one
+_RETRY_BUDGET = 8.0
+# Upper bound for honouring a backend Retry-After on 429 (interactive flow)
+_MAX_RETRY_AFTER = 5.0
+
+def _retry_delay(response: httpx.Response | None, attempt: int) -> float:
+    """Seconds to wait before the next attempt (Retry-After on 429, else exponential backoff)"""
+    if response is not None and response.status_code == 429:
+        try:
+            return min(float(response.headers.get("Retry-After", 1)), _MAX_RETRY_AFTER)
+        except ValueError:
+            return 1.0
+    return _RETRY_BASE_DELAY * 2 ** attempt
+
+async def _post_json(path: str, payload: dict) -> httpx.Response:
+    """POST a JSON payload to the backend, retrying failures it can't have processed with backoff"""
+    content = orjson.dumps(payload)
+    deadline = time.monotonic() + _RETRY_BUDGET
+    for attempt in range(_MAX_ATTEMPTS):
+        is_last = attempt == _MAX_ATTEMPTS - 1 or time.monotonic() >= deadline
+        try:
+            response = await get_client().post(path, content=content, headers=_JSON_HEADERS)
+        except _RETRY_EXCEPTIONS:
+            if is_last:
+                raise
+            response = None
+        else:
+            if is_last or response.status_code not in _RETRY_STATUSES:
+                return response
+        await asyncio.sleep(min(_retry_delay(response, attempt), max(deadline - time.monotonic(), 0.0)))
+
+# Pending send-code requests keyed by (telegram_id, phone), so repeated taps share one backend call
+_inflight_auth_requests: dict[tuple[int, str], asyncio.Task] = {}
+
+# Code verification attempts allowed per user within a sliding window
+_CODE_ATTEMPT_LIMIT = 5
+_CODE_ATTEMPT_WINDOW = 60.0
+# Ordered by each user's latest attempt, so users idle past the window sit at the front
+_code_attempts: "OrderedDict[int, deque]" = OrderedDict()
+
+def _code_attempt_allowed(telegram_id: int) -> bool:
+    """Record a verification attempt, returning False if the user is over the limit"""
+    now = time.monotonic()
+    # Forget users whose newest attempt has left the window (e.g. they never finished logging in)
+    while _code_attempts:
+        oldest_id, oldest = next(iter(_code_attempts.items()))
+        if now - oldest[-1] < _CODE_ATTEMPT_WINDOW:
+            break
+        del _code_attempts[oldest_id]
+    
+    attempts = _code_attempts.setdefault(telegram_id, deque(maxlen=_CODE_ATTEMPT_LIMIT))
+    if len(attempts) == _CODE_ATTEMPT_LIMIT and now - attempts[0] < _CODE_ATTEMPT_WINDOW:
+        return False
+    attempts.append(now)
+    _code_attempts.move_to_end(telegram_id)
+    return True
+
 class AuthStates(StatesGroup):
     waiting_for_phone = State()
     waiting_for_code = State()
 
 def convert_phone_to_iranian_format(phone: str) -> str:
     """
-    Convert phone number from +989123456789 format to 09123456789 format
+    Convert user-entered phone number from +989123456789 format to 09123456789 format
     """
     # Remove any spaces or special characters
-    phone = re.sub(r'[^\d+]', '', phone)
-    
+    return _contact_to_iranian(_NON_DIGIT.sub('', phone))
+
+def _contact_to_iranian(phone: str) -> str:
+    """
+    Convert an already clean phone number (e.g. Telegram contact) to 09xx format
+    """
     # If it starts with +98, convert to 09xx format
     if phone.startswith('+98'):
         return '0' + phone[3:]
@@ -48,53 +175,56 @@ def convert_phone_to_iranian_format(phone: str) -> str:
 async def send_auth_request(phone: str, telegram_id: int) -> dict:
     """
     Send authentication request to backend API
+    Concurrent calls for the same user and phone wait on a single request
+    """
+    key = (telegram_id, phone)
+    task = _inflight_auth_requests.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_post_auth_request(phone, telegram_id))
+        _inflight_auth_requests[key] = task
+        task.add_done_callback(lambda _: _inflight_auth_requests.pop(key, None))
+    
+    # Shield so one caller being cancelled does not cancel the shared request
+    return await asyncio.shield(task)
+
+async def _post_auth_request(phone: str, telegram_id: int) -> dict:
+    """
     POST to BASE_URL/bot/auth/send
     """
+    payload = {
+        "phone": phone,
+        "telegram_id": str(telegram_id)
+    }
+    
     try:
-        url = f"{config.BASE_URL}/bot/auth/send"
+        response = await _post_json(SEND_CODE_PATH, payload)
         
-        payload = {
-            "phone": phone,
-            "telegram_id": str(telegram_id)
-        }
-        
-        headers = {
-            "Content-Type": "application/json"
-        }
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Auth API Response: %s - %s", response.status_code, response.text)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=10.0
-            )
-            
-            print(f"Auth API Response: {response.status_code} - {response.text}")
+        if response.status_code == 200:
+            response_data = orjson.loads(response.content)
+            return {
+                "success": True,
+                "data": response_data,
+                "status_code": response.status_code
+            }
+        elif response.status_code == 409:
+            response_data = orjson.loads(response.content)
+            return {
+                "success": False,
+                "error": response_data.get("error", "user not found"),
+                "status_code": response.status_code
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"API returned status {response.status_code}",
+                "status_code": response.status_code
+            }
             
-            if response.status_code == 200:
-                response_data = response.json()
-                return {
-                    "success": True,
-                    "data": response_data,
-                    "status_code": response.status_code
-                }
-            elif response.status_code == 409:
-                response_data = response.json()
-                return {
-                    "success": False,
-                    "error": response_data.get("error", "user not found"),
-                    "status_code": response.status_code
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API returned status {response.status_code}",
-                    "status_code": response.status_code
-                }
-                
-    except Exception as e:
-        print(f"Error sending auth request to API: {e}")
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        logger.error("Error sending auth request to API: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -106,51 +236,40 @@ async def verify_sms_code(telegram_id: int, code: str) -> dict:
     Verify SMS code with backend API
     POST to BASE_URL/bot/auth/verify
     """
+    payload = {
+        "telegram_id": str(telegram_id),
+        "code": code
+    }
+    
     try:
-        url = f"{config.BASE_URL}/bot/auth/verify"
+        response = await _post_json(VERIFY_CODE_PATH, payload)
         
-        payload = {
-            "telegram_id": str(telegram_id),
-            "code": code
-        }
-        
-        headers = {
-            "Content-Type": "application/json"
-        }
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Verify API Response: %s - %s", response.status_code, response.text)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=10.0
-            )
-            
-            print(f"Verify API Response: {response.status_code} - {response.text}")
+        if response.status_code == 200:
+            response_data = orjson.loads(response.content)
+            return {
+                "success": True,
+                "data": response_data,
+                "status_code": response.status_code
+            }
+        elif response.status_code == 409:
+            response_data = orjson.loads(response.content)
+            return {
+                "success": False,
+                "error": response_data.get("error", "کد تایید اشتباه است"),
+                "status_code": response.status_code
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"API returned status {response.status_code}",
+                "status_code": response.status_code
+            }
             
-            if response.status_code == 200:
-                response_data = response.json()
-                return {
-                    "success": True,
-                    "data": response_data,
-                    "status_code": response.status_code
-                }
-            elif response.status_code == 409:
-                response_data = response.json()
-                return {
-                    "success": False,
-                    "error": response_data.get("error", "کد تایید اشتباه است"),
-                    "status_code": response.status_code
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API returned status {response.status_code}",
-                    "status_code": response.status_code
-                }
-                
-    except Exception as e:
-        print(f"Error verifying SMS code with API: {e}")
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        logger.error("Error verifying SMS code with API: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -160,23 +279,26 @@ async def verify_sms_code(telegram_id: int, code: str) -> dict:
 def validate_phone_number(phone: str) -> bool:
     """Validate phone number format (Iranian format)"""
     # Remove any spaces or special characters
-    clean_phone = re.sub(r'[^\d+]', '', phone)
+    clean_phone = _NON_DIGIT.sub('', phone)
+    
+    # Only ASCII digits are accepted (isdigit() alone would allow Persian digits)
+    if not clean_phone.isascii():
+        return False
     
     # Check if it's in +989123456789 format
-    if re.match(r'^\+98[0-9]{10}$', clean_phone):
+    if len(clean_phone) == 13 and clean_phone.startswith('+98') and clean_phone[3:].isdigit():
         return True
     
     # Check if it's in 09123456789 format
-    if re.match(r'^09[0-9]{9}$', clean_phone):
+    if len(clean_phone) == 11 and clean_phone.startswith('09') and clean_phone[2:].isdigit():
         return True
     
     # Check if it's in 989123456789 format
-    if re.match(r'^98[0-9]{10}$', clean_phone):
+    if len(clean_phone) == 12 and clean_phone.startswith('98') and clean_phone[2:].isdigit():
         return True
     
     return False
 
-@router.message(F.text == "/start")
 async def start_auth(message: types.Message, state: FSMContext):
     """Handle /start command - show authentication options"""
     await message.answer(
@@ -185,14 +307,12 @@ async def start_auth(message: types.Message, state: FSMContext):
         reply_markup=get_auth_keyboard()
     )
 
-@router.message(F.text == "📱 اشتراک‌گذاری شماره تلفن")
 async def share_phone_button(message: types.Message, state: FSMContext):
     """Handle phone sharing button"""
     await message.answer(
         "📱 لطفاً دکمه اشتراک‌گذاری شماره تلفن را فشار دهید تا شماره شما به صورت خودکار وارد شود."
     )
 
-@router.message(F.text == "📝 ورود با شماره تلفن")
 async def manual_phone_entry(message: types.Message, state: FSMContext):
     """Handle manual phone number entry"""
     await message.answer(
@@ -201,6 +321,18 @@ async def manual_phone_entry(message: types.Message, state: FSMContext):
     )
     await state.set_state(AuthStates.waiting_for_phone)
 
+# Auth command/button text -> handler, routed through a single set-membership filter
+_TEXT_DISPATCH = {
+    "/start": start_auth,
+    SHARE_PHONE_TEXT: share_phone_button,
+    MANUAL_PHONE_TEXT: manual_phone_entry,
+}
+
+@router.message(F.text.in_(frozenset(_TEXT_DISPATCH)))
+async def handle_auth_text(message: types.Message, state: FSMContext):
+    """Dispatch /start and auth keyboard button presses"""
+    await _TEXT_DISPATCH[message.text](message, state)
+
 @router.message(AuthStates.waiting_for_phone)
 async def handle_phone_input(message: types.Message, state: FSMContext):
     """Handle manual phone number input"""
@@ -226,24 +358,18 @@ async def handle_phone_input(message: types.Message, state: FSMContext):
         # Success response
         response_data = api_response["data"]
         if response_data.get("message") == "success":
-            await message.answer(
-                f"✅ کد تایید برای شماره {iranian_phone} ارسال شد.\n\n"
-                "لطفاً کد 6 رقمی دریافتی را وارد کنید:"
-            )
+            await message.answer(_CODE_SENT_TPL.format_map({"phone": iranian_phone}))
             await state.set_state(AuthStates.waiting_for_code)
             # Store phone in state for verification
             await state.update_data(phone=iranian_phone)
         else:
-            await message.answer("❌ خطا در ارسال کد تایید. لطفاً دوباره تلاش کنید.")
+            await message.answer(_SEND_CODE_FAILED_TEXT)
     else:
         # Error response
         if api_response["status_code"] == 409:
-            await message.answer(
-                "❌ کاربری با این شماره تلفن یافت نشد.\n\n"
-                "لطفاً شماره صحیح خود را وارد کنید یا با پشتیبانی تماس بگیرید."
-            )
+            await message.answer(_USER_NOT_FOUND_TEXT)
         else:
-            await message.answer("❌ خطا در ارتباط با سرور. لطفاً دوباره تلاش کنید.")
+            await message.answer(_SERVER_ERROR_TEXT)
 
 @router.message(F.contact)
 async def handle_contact_shared(message: types.Message, state: FSMContext):
@@ -254,8 +380,8 @@ async def handle_contact_shared(message: types.Message, state: FSMContext):
     
     phone = message.contact.phone_number
     
-    # Convert to Iranian format (09xx)
-    iranian_phone = convert_phone_to_iranian_format(phone)
+    # Convert to Iranian format (09xx) - contact numbers are already digits only
+    iranian_phone = _contact_to_iranian(phone)
     
     # Send authentication request to backend
     api_response = await send_auth_request(iranian_phone, message.chat.id)
@@ -265,24 +391,20 @@ async def handle_contact_shared(message: types.Message, state: FSMContext):
         response_data = api_response["data"]
         if response_data.get("message") == "success":
             await message.answer(
-                f"✅ کد تایید برای شماره {iranian_phone} ارسال شد.\n\n"
-                "لطفاً کد 6 رقمی دریافتی را وارد کنید:",
+                _CODE_SENT_TPL.format_map({"phone": iranian_phone}),
                 reply_markup=types.ReplyKeyboardRemove()
             )
             await state.set_state(AuthStates.waiting_for_code)
             # Store phone in state for verification
             await state.update_data(phone=iranian_phone)
         else:
-            await message.answer("❌ خطا در ارسال کد تایید. لطفاً دوباره تلاش کنید.")
+            await message.answer(_SEND_CODE_FAILED_TEXT)
     else:
         # Error response
         if api_response["status_code"] == 409:
-            await message.answer(
-                "❌ کاربری با این شماره تلفن یافت نشد.\n\n"
-                "لطفاً شماره صحیح خود را وارد کنید یا با پشتیبانی تماس بگیرید."
-            )
+            await message.answer(_USER_NOT_FOUND_TEXT)
         else:
-            await message.answer("❌ خطا در ارتباط با سرور. لطفاً دوباره تلاش کنید.")
+            await message.answer(_SERVER_ERROR_TEXT)
 
 @router.message(AuthStates.waiting_for_code)
 async def handle_code_input(message: types.Message, state: FSMContext):
@@ -290,10 +412,15 @@ async def handle_code_input(message: types.Message, state: FSMContext):
     code = message.text.strip()
     
     # Validate code format (6 digits)
-    if not code.isdigit() or len(code) != 6:
+    if len(code) != 6 or not code.isdigit():
         await message.answer("❌ کد تایید باید 6 رقم باشد. لطفاً دوباره وارد کنید:")
         return
     
+    # Throttle brute-force attempts before they reach the backend
+    if not _code_attempt_allowed(message.chat.id):
+        await message.answer("❌ تعداد تلاش‌ها بیش از حد است. لطفاً یک دقیقه دیگر دوباره تلاش کنید.")
+        return
+    
     # Verify the code with backend API
     api_response = await verify_sms_code(message.chat.id, code)
     
@@ -304,27 +431,30 @@ async def handle_code_input(message: types.Message, state: FSMContext):
         user_name = result.get("name", "کاربر")
         
         await message.answer(
-            f"سلام {user_name} خوش آمدید!",
+            _WELCOME_TPL.format_map({"name": user_name}),
             reply_markup=main_menu.get_main_menu_keyboard(message.chat.id)
         )
         await state.clear()
+        _code_attempts.pop(message.chat.id, None)
     else:
         # Code is invalid
         if api_response["status_code"] == 409:
             await message.answer("❌ کد تایید اشتباه است. لطفاً دوباره وارد کنید:")
         else:
-            await message.answer("❌ خطا در ارتباط با سرور. لطفاً دوباره تلاش کنید.")
+            await message.answer(_SERVER_ERROR_TEXT)
+
+# Authentication keyboard is static, so it is built once and shared
+_AUTH_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [
+            KeyboardButton(text=SHARE_PHONE_TEXT, request_contact=True),
+            KeyboardButton(text=MANUAL_PHONE_TEXT)
+        ]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
 
 def get_auth_keyboard():
     """Get authentication keyboard"""
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                KeyboardButton(text="📱 اشتراک‌گذاری شماره تلفن", request_contact=True),
-                KeyboardButton(text="📝 ورود با شماره تلفن")
-            ]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
-    return keyboard
\ No newline at end of file
+    return _AUTH_KEYBOARD
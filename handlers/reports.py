@@ -7,52 +7,60 @@ from keyboards.navigation import home_button
 
 router = Router()
 
+# Everyone allowed to use the reports (managers and sellers)
+_AUTHORIZED_IDS = frozenset(config.MANAGER_IDS) | frozenset(config.SELLER_IDS)
+
+# Report texts (placeholders until full reporting is implemented)
+_SELLER_REPORT_TPL = (
+    "📊 گزارش روزانه شما - {date}\n\n"
+    "• لیدهای جدید: 0\n"
+    "• تماس‌های انجام شده: 0\n"
+    "• فروش امروز: 0 تومان\n\n"
+    "گزارش‌گیری کامل در حال توسعه است."
+)
+_MANAGER_REPORT_TPL = (
+    "📊 گزارش مدیریتی - {date}\n\n"
+    "• کل فروشندگان: 0\n"
+    "• کل لیدها: 0\n"
+    "• فروش کل: 0 تومان\n\n"
+    "گزارش‌گیری کامل در حال توسعه است."
+)
+_REPORTS_MENU_TEXT = (
+    "📊 گزارش‌های موجود:\n\n"
+    "• 📈 گزارش روزانه\n"
+    "• 📈 گزارش هفتگی\n"
+    "• 📈 گزارش ماهانه\n\n"
+    "برای مشاهده گزارش‌ها، از دستور /report استفاده کنید."
+)
+
 @router.message(F.text == "/report")
 async def command_report(message: types.Message):
     """Handle /report command - show user's detailed daily report."""
     user_id = message.from_user.id
     
-    if user_id not in config.SELLER_IDS and user_id not in config.MANAGER_IDS:
+    if user_id not in _AUTHORIZED_IDS:
         await message.answer("❌ شما مجاز به استفاده از این دستور نیستید.")
         return
     
-    # Get today's date
-    date_str = datetime.now().strftime("%Y-%m-%d")
+    # Get today's date in the team's timezone
+    date_str = datetime.now(config.TZ).strftime("%Y-%m-%d")
     
     if user_id in config.SELLER_IDS:
         # Simple report for seller (placeholder)
-        detailed_report = f"📊 گزارش روزانه شما - {date_str}\n\n"
-        detailed_report += "• لیدهای جدید: 0\n"
-        detailed_report += "• تماس‌های انجام شده: 0\n"
-        detailed_report += "• فروش امروز: 0 تومان\n\n"
-        detailed_report += "گزارش‌گیری کامل در حال توسعه است."
-        
-        await message.answer(detailed_report)
+        await message.answer(_SELLER_REPORT_TPL.format(date=date_str))
     
     elif user_id in config.MANAGER_IDS:
         # Manager report (placeholder)
-        manager_report = f"📊 گزارش مدیریتی - {date_str}\n\n"
-        manager_report += "• کل فروشندگان: 0\n"
-        manager_report += "• کل لیدها: 0\n"
-        manager_report += "• فروش کل: 0 تومان\n\n"
-        manager_report += "گزارش‌گیری کامل در حال توسعه است."
-        
-        await message.answer(manager_report)
+        await message.answer(_MANAGER_REPORT_TPL.format(date=date_str))
 
 @router.message(F.text == "📊 گزارش‌ها")
 async def show_reports_menu(message: types.Message):
     """Show reports menu"""
     user_id = message.from_user.id
     
-    if user_id not in config.SELLER_IDS and user_id not in config.MANAGER_IDS:
+    if user_id not in _AUTHORIZED_IDS:
         await message.answer("❌ شما مجاز به استفاده از این قابلیت نیستید.")
         return
     
     # Simple reports menu
-    text = "📊 گزارش‌های موجود:\n\n"
-    text += "• 📈 گزارش روزانه\n"
-    text += "• 📈 گزارش هفتگی\n"
-    text += "• 📈 گزارش ماهانه\n\n"
-    text += "برای مشاهده گزارش‌ها، از دستور /report استفاده کنید."
-    
-    await message.answer(text)
+    await message.answer(_REPORTS_MENU_TEXT)
@@ -2,13 +2,22 @@
 Main Seller Dashboard
 Project-based workflow for sellers - API-based
 """
+import asyncio
+import httpx
+import orjson
+import re
+import time
+from functools import lru_cache
+from types import MappingProxyType
 from aiogram import Router, types, F
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 import config
 from keyboards.navigation import home_button
+from utils.telegram_helpers import edit_if_changed
 
 from datetime import datetime, timedelta
 
@@ -25,30 +34,191 @@ class ReminderStates(StatesGroup):
     waiting_project = State()
     waiting_lead = State()
 
-# Store user's current project selection
-user_projects = {}
+# Callback data factories: aiogram parses and type-converts the fields before the handler runs
+class ProjectCB(CallbackData, prefix="project"):
+    project_id: int
+
+class LeadsCB(CallbackData, prefix="leads"):
+    status: str
+    project_id: int
+    offset: int = 0
+
+class LeadCB(CallbackData, prefix="lead"):
+    lead_id: int
+
+class UpdateLeadCB(CallbackData, prefix="update_lead"):
+    lead_id: int
+    status: str
+
+class ReminderCB(CallbackData, prefix="reminder"):
+    target_type: str  # 'project' or 'lead'
+    target_id: int
+
+class ProjectReportCB(CallbackData, prefix="report_project"):
+    project_id: int
+
+# Leads shown per page in the leads list
+LEADS_PAGE_SIZE = 10
+
+# Reminder time input: "YYYY-MM-DD HH:MM"
+_REMINDER_TIME_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2})")
+_REMINDER_TIME_FORMAT_ERROR = (
+    "❌ فرمت زمان صحیح نیست!\n\n"
+    "لطفاً زمان را به فرمت زیر وارد کنید:\n"
+    "YYYY-MM-DD HH:MM\n"
+    "مثال: 2024-01-15 14:30"
+)
+
+# Persian display names for lead statuses (read-only, shared by all handlers)
+_STATUS_NAMES_FA = MappingProxyType({
+    "new": "جدید",
+    "contacted": "تماس گرفته شده",
+    "qualified": "واجد شرایط",
+    "proposal": "پیشنهاد ارسال شده",
+    "negotiation": "مذاکره"
+})
+
+# Static keyboard shown while a reminder is being created (built once at import)
+_CANCEL_REMINDER_MARKUP = types.InlineKeyboardMarkup(inline_keyboard=[
+    [types.InlineKeyboardButton(text="❌ لغو", callback_data="cancel_reminder")]
+])
+
+class _TemplateView(dict):
+    """API payload for str.format_map: missing fields fall back to per-template defaults"""
+
+    def __init__(self, data: dict, defaults: dict):
+        super().__init__(data)
+        self.defaults = defaults
+
+    def __missing__(self, key):
+        return self.defaults.get(key, "نامشخص")
+
+# Message templates rendered with format_map (parsed once here instead of per f-string)
+_LEAD_DETAILS_TPL = (
+    " اطلاعات لید:\n\n"
+    "📋 نام: {customer_name}\n"
+    "🏢 شرکت: {company}\n"
+    "📱 تلفن: {phone}\n"
+    " ایمیل: {email}\n"
+    "💰 ارزش: {value:,} تومان\n"
+    " وضعیت: {stage}\n"
+    "⭐ اولویت: {priority}\n"
+    " تاریخ ایجاد: {created_at}\n\n"
+    "📝 توضیحات:\n{description}"
+)
+_LEAD_DETAILS_DEFAULTS = {"value": 0, "priority": "متوسط", "description": "بدون توضیحات"}
+
+_PROJECT_REPORT_TPL = (
+    " گزارش پروژه:\n\n"
+    "📁 نام پروژه: {project_name}\n"
+    "📅 دوره: {period}\n\n"
+    "📈 آمار کلی:\n"
+    "• کل لیدها: {total_leads}\n"
+    "• لیدهای جدید: {new_leads}\n"
+    "• لیدهای تماس گرفته شده: {contacted_leads}\n"
+    "• لیدهای واجد شرایط: {qualified_leads}\n"
+    "• پیشنهادات ارسال شده: {proposal_leads}\n"
+    "• مذاکرات: {negotiation_leads}\n\n"
+    "💰 ارزش کل: {total_value:,} تومان\n"
+    "📊 نرخ تبدیل: {conversion_rate:.1f}%"
+)
+_PROJECT_REPORT_DEFAULTS = {
+    "total_leads": 0,
+    "new_leads": 0,
+    "contacted_leads": 0,
+    "qualified_leads": 0,
+    "proposal_leads": 0,
+    "negotiation_leads": 0,
+    "total_value": 0,
+    "conversion_rate": 0,
+}
+
+# Leads list button label
+_LEAD_BUTTON_TPL = "👤 {customer_name} - {value:,} تومان"
+_LEAD_BUTTON_DEFAULTS = {"value": 0}
 
 # API endpoints - replace with your actual endpoints
 API_BASE_URL = "https://your-real-api-domain.com"
 
+# Shared HTTP client for backend API calls (keeps connections alive between callbacks)
+_client: httpx.AsyncClient | None = None
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared backend HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+            # Multiplex menu bursts over one connection instead of queueing for pool slots
+            http2=True
+        )
+    return _client
+
+async def close_http():
+    """Close the shared backend HTTP client (called on bot shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+# HTTP methods that carry a JSON body (GET/DELETE never send one, as before)
+_BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+# Short-lived cache for project GETs (seller project list, project details and report),
+# which change rarely but are re-fetched on every menu click
+_PROJECT_CACHE_TTL = 60.0
+_PROJECT_CACHE_MAX_SIZE = 1024
+_CACHEABLE_GET_RE = re.compile(r"/api/(sellers/\d+/projects|projects/\d+(/report\?.*)?)")
+_project_cache: dict[str, tuple[float, dict]] = {}
+_inflight_gets: dict[str, asyncio.Task] = {}
+# Bumped on every write so GETs started before the write are not cached
+_cache_generation = 0
+
 async def call_api(endpoint: str, data: dict = None, method: str = "GET") -> dict:
-    """Generic API call function"""
-    import httpx
+    """Generic API call function (project GETs are cached briefly and de-duplicated)"""
+    global _cache_generation
+    method = method.upper()
+    
+    if method != "GET":
+        # Any write may change project stats, so drop everything cached
+        _cache_generation += 1
+        _project_cache.clear()
+        return await _request_api(endpoint, data, method)
+    
+    if not _CACHEABLE_GET_RE.fullmatch(endpoint):
+        return await _request_api(endpoint, data, method)
+    
+    cached = _project_cache.get(endpoint)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    
+    # Concurrent callbacks for the same endpoint share one request
+    task = _inflight_gets.get(endpoint)
+    if task is None:
+        task = asyncio.ensure_future(_request_api(endpoint, data, method))
+        _inflight_gets[endpoint] = task
+        task.add_done_callback(lambda _: _inflight_gets.pop(endpoint, None))
+    generation = _cache_generation
+    result = await asyncio.shield(task)
+    
+    if result["success"] and generation == _cache_generation:
+        if len(_project_cache) >= _PROJECT_CACHE_MAX_SIZE:
+            _project_cache.clear()
+        _project_cache[endpoint] = (time.monotonic() + _PROJECT_CACHE_TTL, result)
+    return result
+
+async def _request_api(endpoint: str, data: dict, method: str) -> dict:
+    """Send a single request to the backend API"""
     try:
-        async with httpx.AsyncClient() as client:
-            if method.upper() == "GET":
-                response = await client.get(f"{API_BASE_URL}{endpoint}", timeout=10.0)
-            elif method.upper() == "POST":
-                response = await client.post(f"{API_BASE_URL}{endpoint}", json=data, timeout=10.0)
-            elif method.upper() == "PUT":
-                response = await client.put(f"{API_BASE_URL}{endpoint}", json=data, timeout=10.0)
-            elif method.upper() == "DELETE":
-                response = await client.delete(f"{API_BASE_URL}{endpoint}", timeout=10.0)
-            
-            if response.status_code in [200, 201]:
-                return {"success": True, "data": response.json()}
-            else:
-                return {"success": False, "error": f"API returned status {response.status_code}"}
+        body = data if method in _BODY_METHODS else None
+        response = await get_client().request(method, endpoint, json=body)
+        
+        if response.status_code in [200, 201]:
+            return {"success": True, "data": orjson.loads(response.content)}
+        else:
+            return {"success": False, "error": f"API returned status {response.status_code}"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -78,35 +248,34 @@ async def seller_projects(message: types.Message):
         )
         return
     
-    # Create projects keyboard
-    builder = InlineKeyboardBuilder()
-    for project in projects:
-        builder.button(
+    # Create projects keyboard: one button per row, built directly without the builder
+    rows = [
+        [types.InlineKeyboardButton(
             text=f"📁 {project['name']} ({project.get('total_leads', 0)} لید)",
-            callback_data=f"project_{project['id']}"
-        )
-    
-    builder.button(text="🏠 بازگشت به منوی اصلی", callback_data="nav_home")
-    builder.adjust(1)
+            callback_data=ProjectCB(project_id=project['id']).pack()
+        )]
+        for project in projects
+    ]
+    rows.append([types.InlineKeyboardButton(text="🏠 بازگشت به منوی اصلی", callback_data="nav_home")])
     
     await message.answer(
         " پروژه‌های شما:\n\n"
         "لطفاً یکی از پروژه‌ها را انتخاب کنید:",
-        reply_markup=builder.as_markup()
+        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=rows)
     )
 
-@router.callback_query(F.data.startswith("project_"))
-async def handle_project_selection(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(ProjectCB.filter())
+async def handle_project_selection(callback: types.CallbackQuery, callback_data: ProjectCB, state: FSMContext):
     """Handle project selection"""
-    project_id = int(callback.data.split("_")[1])
+    project_id = callback_data.project_id
     user_id = callback.from_user.id
     
-    # Store selected project
-    await state.update_data(selected_project_id=project_id)
-    await state.set_state(SellerStates.project_selected)
-    
-    # Get project details from API
-    api_response = await call_api(f"/api/projects/{project_id}")
+    # Get project details from API while storing the selected project
+    api_response, _, _ = await asyncio.gather(
+        call_api(f"/api/projects/{project_id}"),
+        state.update_data(selected_project_id=project_id),
+        state.set_state(SellerStates.project_selected)
+    )
     
     if not api_response["success"]:
         await callback.answer("❌ خطا در دریافت اطلاعات پروژه", show_alert=True)
@@ -116,18 +285,19 @@ async def handle_project_selection(callback: types.CallbackQuery, state: FSMCont
     
     # Show project menu
     builder = InlineKeyboardBuilder()
-    builder.button(text="👥 لیدهای جدید", callback_data=f"leads_new_{project_id}")
-    builder.button(text="📞 لیدهای تماس گرفته شده", callback_data=f"leads_contacted_{project_id}")
-    builder.button(text="✅ لیدهای واجد شرایط", callback_data=f"leads_qualified_{project_id}")
-    builder.button(text="📋 پیشنهادات ارسال شده", callback_data=f"leads_proposal_{project_id}")
-    builder.button(text=" مذاکرات", callback_data=f"leads_negotiation_{project_id}")
-    builder.button(text="🔔 ایجاد یادآور", callback_data=f"reminder_project_{project_id}")
-    builder.button(text="📊 گزارش پروژه", callback_data=f"report_project_{project_id}")
+    builder.button(text="👥 لیدهای جدید", callback_data=LeadsCB(status="new", project_id=project_id))
+    builder.button(text="📞 لیدهای تماس گرفته شده", callback_data=LeadsCB(status="contacted", project_id=project_id))
+    builder.button(text="✅ لیدهای واجد شرایط", callback_data=LeadsCB(status="qualified", project_id=project_id))
+    builder.button(text="📋 پیشنهادات ارسال شده", callback_data=LeadsCB(status="proposal", project_id=project_id))
+    builder.button(text=" مذاکرات", callback_data=LeadsCB(status="negotiation", project_id=project_id))
+    builder.button(text="🔔 ایجاد یادآور", callback_data=ReminderCB(target_type="project", target_id=project_id))
+    builder.button(text="📊 گزارش پروژه", callback_data=ProjectReportCB(project_id=project_id))
     builder.button(text="🏠 بازگشت", callback_data="nav_home")
     
     builder.adjust(2, 2, 2, 1, 1)
     
-    await callback.message.edit_text(
+    await edit_if_changed(
+        callback.message,
         f"📁 پروژه: {project['name']}\n\n"
         f"📊 آمار کلی:\n"
         f"• کل لیدها: {project.get('total_leads', 0)}\n"
@@ -138,56 +308,75 @@ async def handle_project_selection(callback: types.CallbackQuery, state: FSMCont
         reply_markup=builder.as_markup()
     )
 
-@router.callback_query(F.data.startswith("leads_"))
-async def handle_leads_view(callback: types.CallbackQuery):
+@router.callback_query(LeadsCB.filter())
+async def handle_leads_view(callback: types.CallbackQuery, callback_data: LeadsCB):
     """Handle leads view by status"""
-    parts = callback.data.split("_")
-    status = parts[1]
-    project_id = int(parts[2])
+    status = callback_data.status
+    project_id = callback_data.project_id
+    offset = callback_data.offset
     user_id = callback.from_user.id
     
-    # Get leads with this status from API
-    api_response = await call_api(f"/api/projects/{project_id}/leads?status={status}&user_id={user_id}")
+    # Get one page of leads with this status from API (the backend paginates)
+    api_response = await call_api(
+        f"/api/projects/{project_id}/leads?status={status}&user_id={user_id}"
+        f"&limit={LEADS_PAGE_SIZE}&offset={offset}"
+    )
     
     if not api_response["success"]:
         await callback.answer("❌ خطا در دریافت لیدها", show_alert=True)
         return
     
-    leads = api_response["data"].get("leads", [])
-    status_name = {
-        "new": "جدید",
-        "contacted": "تماس گرفته شده", 
-        "qualified": "واجد شرایط",
-        "proposal": "پیشنهاد ارسال شده",
-        "negotiation": "مذاکره"
-    }.get(status, status)
+    data = api_response["data"]
+    leads = data.get("leads", [])
+    if len(leads) > LEADS_PAGE_SIZE:
+        # The backend ignored limit/offset and sent the whole list, so page it here
+        total = len(leads)
+        leads = leads[offset:offset + LEADS_PAGE_SIZE]
+        has_next = offset + LEADS_PAGE_SIZE < total
+        count_text = str(total)
+    elif "total" in data:
+        total = data["total"]
+        has_next = offset + len(leads) < total
+        count_text = str(total)
+    else:
+        # No total: a full page means there may be more leads
+        has_next = len(leads) == LEADS_PAGE_SIZE
+        count_text = f"{offset + len(leads)}+" if has_next else str(offset + len(leads))
+    status_name = _STATUS_NAMES_FA.get(status, status)
     
     if not leads:
         await callback.answer(f"❌ هیچ لید {status_name}ی یافت نشد", show_alert=True)
         return
     
-    # Create leads keyboard
-    builder = InlineKeyboardBuilder()
-    for lead in leads[:10]:  # Limit to 10 leads
-        builder.button(
-            text=f"👤 {lead.get('customer_name', 'نامشخص')} - {lead.get('value', 0):,} تومان",
-            callback_data=f"lead_{lead['id']}"
-        )
-    
-    builder.button(text="🏠 بازگشت", callback_data=f"project_{project_id}")
-    builder.adjust(1)
-    
-    await callback.message.edit_text(
+    # Create leads keyboard: one button per row, built directly without the builder
+    rows = [
+        [types.InlineKeyboardButton(
+            text=_LEAD_BUTTON_TPL.format_map(_TemplateView(lead, _LEAD_BUTTON_DEFAULTS)),
+            callback_data=LeadCB(lead_id=lead['id']).pack()
+        )]
+        for lead in leads
+    ]
+    
+    if has_next:
+        rows.append([types.InlineKeyboardButton(
+            text="➡️ صفحه بعد",
+            callback_data=LeadsCB(status=status, project_id=project_id, offset=offset + LEADS_PAGE_SIZE).pack()
+        )])
+    
+    rows.append([types.InlineKeyboardButton(text="🏠 بازگشت", callback_data=ProjectCB(project_id=project_id).pack())])
+    
+    await edit_if_changed(
+        callback.message,
         f"👥 لیدهای {status_name}:\n\n"
-        f"تعداد: {len(leads)} لید\n\n"
+        f"تعداد: {count_text} لید\n\n"
         "لطفاً یکی از لیدها را انتخاب کنید:",
-        reply_markup=builder.as_markup()
+        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=rows)
     )
 
-@router.callback_query(F.data.startswith("lead_"))
-async def handle_lead_details(callback: types.CallbackQuery):
+@router.callback_query(LeadCB.filter())
+async def handle_lead_details(callback: types.CallbackQuery, callback_data: LeadCB):
     """Handle lead details view"""
-    lead_id = int(callback.data.split("_")[1])
+    lead_id = callback_data.lead_id
     user_id = callback.from_user.id
     
     # Get lead details from API
@@ -203,38 +392,36 @@ async def handle_lead_details(callback: types.CallbackQuery):
         await callback.answer("❌ لید یافت نشد", show_alert=True)
         return
     
-    # Create lead actions keyboard
+    await _render_lead_menu(callback, lead_id, lead)
+
+@lru_cache(maxsize=1024)
+def _build_lead_markup(lead_id: int) -> types.InlineKeyboardMarkup:
+    """Lead actions keyboard; it only depends on the lead ID, so repeated views reuse it"""
     builder = InlineKeyboardBuilder()
-    builder.button(text="📞 تماس گرفته شد", callback_data=f"update_lead_{lead_id}_contacted")
-    builder.button(text="✅ واجد شرایط", callback_data=f"update_lead_{lead_id}_qualified")
-    builder.button(text="📋 ارسال پیشنهاد", callback_data=f"update_lead_{lead_id}_proposal")
-    builder.button(text=" شروع مذاکره", callback_data=f"update_lead_{lead_id}_negotiation")
-    builder.button(text="🔔 ایجاد یادآور", callback_data=f"reminder_lead_{lead_id}")
+    builder.button(text="📞 تماس گرفته شد", callback_data=UpdateLeadCB(lead_id=lead_id, status="contacted"))
+    builder.button(text="✅ واجد شرایط", callback_data=UpdateLeadCB(lead_id=lead_id, status="qualified"))
+    builder.button(text="📋 ارسال پیشنهاد", callback_data=UpdateLeadCB(lead_id=lead_id, status="proposal"))
+    builder.button(text=" شروع مذاکره", callback_data=UpdateLeadCB(lead_id=lead_id, status="negotiation"))
+    builder.button(text="🔔 ایجاد یادآور", callback_data=ReminderCB(target_type="lead", target_id=lead_id))
     builder.button(text="📝 افزودن یادداشت", callback_data=f"note_lead_{lead_id}")
     builder.button(text="🏠 بازگشت", callback_data="nav_home")
     
     builder.adjust(2, 2, 2, 1)
-    
-    await callback.message.edit_text(
-        f" اطلاعات لید:\n\n"
-        f"📋 نام: {lead.get('customer_name', 'نامشخص')}\n"
-        f"🏢 شرکت: {lead.get('company', 'نامشخص')}\n"
-        f"📱 تلفن: {lead.get('phone', 'نامشخص')}\n"
-        f" ایمیل: {lead.get('email', 'نامشخص')}\n"
-        f"💰 ارزش: {lead.get('value', 0):,} تومان\n"
-        f" وضعیت: {lead.get('stage', 'نامشخص')}\n"
-        f"⭐ اولویت: {lead.get('priority', 'متوسط')}\n"
-        f" تاریخ ایجاد: {lead.get('created_at', 'نامشخص')}\n\n"
-        f"📝 توضیحات:\n{lead.get('description', 'بدون توضیحات')}",
-        reply_markup=builder.as_markup()
+    return builder.as_markup()
+
+async def _render_lead_menu(callback: types.CallbackQuery, lead_id: int, lead: dict):
+    """Show an already-fetched lead with its action buttons"""
+    await edit_if_changed(
+        callback.message,
+        _LEAD_DETAILS_TPL.format_map(_TemplateView(lead, _LEAD_DETAILS_DEFAULTS)),
+        reply_markup=_build_lead_markup(lead_id)
     )
 
-@router.callback_query(F.data.startswith("update_lead_"))
-async def handle_lead_status_update(callback: types.CallbackQuery):
+@router.callback_query(UpdateLeadCB.filter())
+async def handle_lead_status_update(callback: types.CallbackQuery, callback_data: UpdateLeadCB):
     """Handle lead status update"""
-    parts = callback.data.split("_")
-    lead_id = int(parts[2])
-    new_status = parts[3]
+    lead_id = callback_data.lead_id
+    new_status = callback_data.status
     user_id = callback.from_user.id
     
     # Update lead status via API
@@ -245,26 +432,24 @@ async def handle_lead_status_update(callback: types.CallbackQuery):
     )
     
     if api_response["success"]:
-        status_names = {
-            "contacted": "تماس گرفته شده",
-            "qualified": "واجد شرایط", 
-            "proposal": "پیشنهاد ارسال شده",
-            "negotiation": "مذاکره"
-        }
-        status_name = status_names.get(new_status, new_status)
+        status_name = _STATUS_NAMES_FA.get(new_status, new_status)
         await callback.answer(f"✅ وضعیت لید به '{status_name}' تغییر یافت", show_alert=True)
         
-        # Refresh lead details
-        await handle_lead_details(callback)
+        # Refresh lead details: reuse the updated lead if the backend echoes it,
+        # otherwise fall back to fetching it again
+        updated_lead = api_response["data"].get("lead") if isinstance(api_response["data"], dict) else None
+        if updated_lead:
+            await _render_lead_menu(callback, lead_id, updated_lead)
+        else:
+            await handle_lead_details(callback, LeadCB(lead_id=lead_id))
     else:
         await callback.answer("❌ خطا در به‌روزرسانی وضعیت", show_alert=True)
 
-@router.callback_query(F.data.startswith("reminder_"))
-async def handle_reminder_creation(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(ReminderCB.filter())
+async def handle_reminder_creation(callback: types.CallbackQuery, callback_data: ReminderCB, state: FSMContext):
     """Handle reminder creation"""
-    parts = callback.data.split("_")
-    reminder_type = parts[1]  # 'project' or 'lead'
-    target_id = int(parts[2])
+    reminder_type = callback_data.target_type  # 'project' or 'lead'
+    target_id = callback_data.target_id
     user_id = callback.from_user.id
     
     if reminder_type == "project":
@@ -284,20 +469,20 @@ async def handle_reminder_creation(callback: types.CallbackQuery, state: FSMCont
         lead = api_response["data"]
         project_name = lead.get('customer_name', 'نامشخص')
     
-    # Store reminder context
-    await state.update_data(
-        reminder_type=reminder_type,
-        target_id=target_id,
-        project_name=project_name
-    )
-    await state.set_state(ReminderStates.waiting_title)
-    
-    await callback.message.edit_text(
-        f"🔔 ایجاد یادآور برای {project_name}\n\n"
-        "لطفاً عنوان یادآور را وارد کنید:",
-        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=[
-            [types.InlineKeyboardButton(text="❌ لغو", callback_data="cancel_reminder")]
-        ])
+    # Store reminder context and prompt for the title concurrently (FSM storage and Telegram are independent)
+    await asyncio.gather(
+        state.update_data(
+            reminder_type=reminder_type,
+            target_id=target_id,
+            project_name=project_name
+        ),
+        state.set_state(ReminderStates.waiting_title),
+        edit_if_changed(
+            callback.message,
+            f"🔔 ایجاد یادآور برای {project_name}\n\n"
+            "لطفاً عنوان یادآور را وارد کنید:",
+            reply_markup=_CANCEL_REMINDER_MARKUP
+        )
     )
 
 @router.message(ReminderStates.waiting_title)
@@ -336,61 +521,70 @@ async def handle_reminder_time(message: types.Message, state: FSMContext):
     time_str = message.text.strip()
     user_id = message.from_user.id
     
+    # Cheap shape check first so malformed input never reaches the regex or raises
+    match = None
+    if (
+        len(time_str) == 16
+        and time_str[4] == "-"
+        and time_str[7] == "-"
+        and time_str[10] == " "
+        and time_str[13] == ":"
+    ):
+        match = _REMINDER_TIME_RE.fullmatch(time_str)
+    if not match:
+        await message.answer(_REMINDER_TIME_FORMAT_ERROR)
+        return
+    
     try:
-        # Parse datetime
-        due_datetime = datetime.strptime(time_str, "%Y-%m-%d %H:%M")
-        due_timestamp = int(due_datetime.timestamp())
-        
-        # Get reminder data
-        state_data = await state.get_data()
-        title = state_data["title"]
-        text = state_data["text"]
-        reminder_type = state_data["reminder_type"]
-        target_id = state_data["target_id"]
-        
-        # Create reminder via API
-        reminder_data = {
-            "user_id": user_id,
-            "title": title,
-            "text": text,
-            "due_at": due_timestamp,
-            "reminder_type": reminder_type,
-            "target_id": target_id
-        }
-        
-        api_response = await call_api("/api/reminders", reminder_data, "POST")
-        
-        if api_response["success"]:
-            await message.answer(
-                f"✅ یادآور با موفقیت ایجاد شد!\n\n"
-                f" عنوان: {title}\n"
-                f"📄 متن: {text}\n"
-                f"⏰ زمان: {time_str}"
-            )
-        else:
-            await message.answer("❌ خطا در ایجاد یادآور. لطفاً دوباره تلاش کنید.")
-        
-        await state.clear()
-        
+        # Parse datetime (entered in the team's timezone); only impossible dates like Feb 30 fail here
+        due_datetime = datetime(*map(int, match.groups()), tzinfo=config.TZ)
     except ValueError:
+        await message.answer(_REMINDER_TIME_FORMAT_ERROR)
+        return
+    due_timestamp = int(due_datetime.timestamp())
+    
+    # Get reminder data
+    state_data = await state.get_data()
+    title = state_data["title"]
+    text = state_data["text"]
+    reminder_type = state_data["reminder_type"]
+    target_id = state_data["target_id"]
+    
+    # Create reminder via API
+    reminder_data = {
+        "user_id": user_id,
+        "title": title,
+        "text": text,
+        "due_at": due_timestamp,
+        "reminder_type": reminder_type,
+        "target_id": target_id
+    }
+    
+    api_response = await call_api("/api/reminders", reminder_data, "POST")
+    
+    if api_response["success"]:
         await message.answer(
-            "❌ فرمت زمان صحیح نیست!\n\n"
-            "لطفاً زمان را به فرمت زیر وارد کنید:\n"
-            "YYYY-MM-DD HH:MM\n"
-            "مثال: 2024-01-15 14:30"
+            f"✅ یادآور با موفقیت ایجاد شد!\n\n"
+            f" عنوان: {title}\n"
+            f"📄 متن: {text}\n"
+            f"⏰ زمان: {time_str}"
         )
+    else:
+        await message.answer("❌ خطا در ایجاد یادآور. لطفاً دوباره تلاش کنید.")
+    
+    await state.clear()
 
 @router.callback_query(F.data == "cancel_reminder")
 async def cancel_reminder(callback: types.CallbackQuery, state: FSMContext):
     """Cancel reminder creation"""
     await state.clear()
-    await callback.message.edit_text("❌ ایجاد یادآور لغو شد.")
+    await edit_if_changed(callback.message, "❌ ایجاد یادآور لغو شد.")
     await callback.answer()
 
-@router.callback_query(F.data.startswith("report_project_"))
-async def handle_project_report(callback: types.CallbackQuery):
+@router.callback_query(ProjectReportCB.filter())
+async def handle_project_report(callback: types.CallbackQuery, callback_data: ProjectReportCB):
     """Handle project report generation"""
-    project_id = int(callback.data.split("_")[2])
+    project_id = callback_data.project_id
     user_id = callback.from_user.id
     
     # Get project report from API
@@ -407,37 +601,12 @@ async def handle_project_report(callback: types.CallbackQuery):
     builder.button(text="📊 گزارش تفصیلی", callback_data=f"detailed_report_{project_id}")
     builder.button(text="📈 نمودارها", callback_data=f"charts_{project_id}")
     builder.button(text="📋 خروجی Excel", callback_data=f"excel_{project_id}")
-    builder.button(text="🏠 بازگشت", callback_data=f"project_{project_id}")
+    builder.button(text="🏠 بازگشت", callback_data=ProjectCB(project_id=project_id))
     
     builder.adjust(1)
     
-    await callback.message.edit_text(
-        f" گزارش پروژه:\n\n"
-        f"📁 نام پروژه: {report.get('project_name', 'نامشخص')}\n"
-        f"📅 دوره: {report.get('period', 'نامشخص')}\n\n"
-        f"📈 آمار کلی:\n"
-        f"• کل لیدها: {report.get('total_leads', 0)}\n"
-        f"• لیدهای جدید: {report.get('new_leads', 0)}\n"
-        f"• لیدهای تماس گرفته شده: {report.get('contacted_leads', 0)}\n"
-        f"• لیدهای واجد شرایط: {report.get('qualified_leads', 0)}\n"
-        f"• پیشنهادات ارسال شده: {report.get('proposal_leads', 0)}\n"
-        f"• مذاکرات: {report.get('negotiation_leads', 0)}\n\n"
-        f"💰 ارزش کل: {report.get('total_value', 0):,} تومان\n"
-        f"📊 نرخ تبدیل: {report.get('conversion_rate', 0):.1f}%",
+    await edit_if_changed(
+        callback.message,
+        _PROJECT_REPORT_TPL.format_map(_TemplateView(report, _PROJECT_REPORT_DEFAULTS)),
         reply_markup=builder.as_markup()
     )
-
-@router.callback_query(F.data == "nav_home")
-async def navigate_home(callback: types.CallbackQuery, state: FSMContext):
-    """Navigate back to home"""
-    await state.clear()
-    await callback.message.edit_text(
-        "🏠 منوی اصلی\n\n"
-        "لطفاً یکی از گزینه‌های زیر را انتخاب کنید:",
-        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=[
-            [types.InlineKeyboardButton(text="🏢 پروژه‌های من", callback_data="my_projects")],
-            [types.InlineKeyboardButton(text="📊 گزارش‌ها", callback_data="reports")],
-            [types.InlineKeyboardButton(text="🔔 یادآوری‌ها", callback_data="reminders")],
-            [types.InlineKeyboardButton(text=" پروفایل", callback_data="profile")]
-        ])
-    )
@@ -1,29 +1,62 @@
 import asyncio
+import copy
+import time
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
 from typing import Optional, List, Dict, Any
+from collections import OrderedDict
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, Message
 from aiogram import F
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
 import logging
 import httpx
 import json
+import orjson
+import os
 import signal
 import sys
 
 import config
 from handlers import seller_main, reports, auth, common
+from middleware.rate_limit_middleware import RateLimitMiddleware, exempt_from_group_limit
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+# LOG_LEVEL = "WARNING" in config.py silences the per-request and per-probe INFO lines in production
+logging.basicConfig(level=getattr(config, "LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
+# Role lookups run on every update; older config.py files may still use lists
+config.MANAGER_IDS = frozenset(config.MANAGER_IDS)
+config.SELLER_IDS = frozenset(config.SELLER_IDS)
+
+# Idle FSM state/data expire after this long when Redis storage is used
+FSM_STATE_TTL = timedelta(seconds=getattr(config, "FSM_STATE_TTL", 900))
+
 # Create bot and dispatcher with FSM storage
-storage = MemoryStorage()
-bot = Bot(token=config.BOT_TOKEN)
+# Redis keeps FSM data out of the bot process and expires abandoned flows;
+# without REDIS_URL in config, state stays in process memory
+REDIS_URL = getattr(config, "REDIS_URL", None)
+if REDIS_URL:
+    from aiogram.fsm.storage.redis import RedisStorage
+    storage = RedisStorage.from_url(REDIS_URL, state_ttl=FSM_STATE_TTL, data_ttl=FSM_STATE_TTL)
+else:
+    storage = MemoryStorage()
+# One pooled aiohttp session shared by polling, handlers and webhook sends;
+# a larger pool lets bulk sends reuse TLS connections.
+# Requests give up after 20s (polling adds its own long-poll timeout on top)
+bot_session = AiohttpSession(limit=200, timeout=20)
+bot = Bot(token=config.BOT_TOKEN, session=bot_session)
+# Throttle outgoing sends to Telegram's flood limits and retry on 429
+bot.session.middleware(RateLimitMiddleware())
 dp = Dispatcher(storage=storage)
 
 # Include handler routers for essential functionality
@@ -32,13 +65,60 @@ dp.include_router(auth.router)  # Authentication router
 dp.include_router(seller_main.router)  # Main seller dashboard
 dp.include_router(reports.router)  # Basic reports
 
+# Largest number of distinct recipients accepted in one bulk notification
+MAX_BULK_CHAT_IDS = 10_000
+
+# Maximum concurrent sends for a bulk notification (RateLimitMiddleware still enforces Telegram's limits)
+BULK_NOTIFY_CONCURRENCY = 32
+
+# Fallbacks for fields missing from webhook payloads
+DEFAULT_BUTTON_TEXT = "Button"
+DEFAULT_BUTTON_CALLBACK_DATA = "default"
+DEFAULT_RAW_WEBHOOK_MESSAGE = "Test notification from webhook"
+
+# Set by webhook_server.py for its worker processes. The Telethon session file can only be
+# used by one process, and the --bot-only process owns it, so these workers skip Telethon
+WEBHOOK_SERVER_PROCESS = os.environ.get("WEBHOOK_SERVER_PROCESS") == "1"
+
+# Pending-connection queue for the webhook listening socket (uvicorn's default is 2048)
+WEBHOOK_BACKLOG = getattr(config, "WEBHOOK_BACKLOG", 4096)
+
+# Interactive API docs (/docs, /redoc, /openapi.json); set ENABLE_API_DOCS = False in production
+ENABLE_API_DOCS = getattr(config, "ENABLE_API_DOCS", True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared Bot API client at startup; in webhook_server.py workers, close the shared clients on exit"""
+    get_telegram_api_client()
+    yield
+    # webhook_server.py workers never run the dispatcher's shutdown hook, so they clean up here.
+    # In the combined `python main.py` mode polling may still be running on this loop;
+    # the dispatcher's on_shutdown closes everything there
+    if WEBHOOK_SERVER_PROCESS:
+        await close_telegram_api_client()
+        await close_backend_client()
+        await close_telethon_client()
+        await bot.session.close()
+
 # Create FastAPI app for webhook
 app = FastAPI(
+    lifespan=lifespan,
     title="Telegram Bot Webhook API",
     description="API for sending notifications to Telegram users via webhook",
-    version="1.0.0"
+    version="1.0.0",
+    docs_url="/docs" if ENABLE_API_DOCS else None,
+    redoc_url="/redoc" if ENABLE_API_DOCS else None,
+    openapi_url="/openapi.json" if ENABLE_API_DOCS else None,
+    # Serialize responses with orjson instead of the stdlib json encoder
+    default_response_class=ORJSONResponse
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Turn unexpected errors in any route into a JSON 500 (routes return expected errors themselves)"""
+    logger.error(f"Error processing {request.method} {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=500, content={"detail": f"Internal server error: {str(exc)}"})
+
 # Pydantic models for webhook requests
 class NotificationRequest(BaseModel):
     """Request model for sending notifications"""
@@ -46,14 +126,13 @@ class NotificationRequest(BaseModel):
     message: str = Field(..., description="Message text to send")
     parse_mode: Optional[str] = Field("HTML", description="Message parsing mode (HTML, Markdown)")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "chat_id": 1327318563,
-                "message": "Hello! This is a test notification from your CRM system.",
-                "parse_mode": "HTML"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "chat_id": 1327318563,
+            "message": "Hello! This is a test notification from your CRM system.",
+            "parse_mode": "HTML"
         }
+    })
 
 class NotificationWithButtonsRequest(BaseModel):
     """Request model for sending notifications with buttons"""
@@ -61,17 +140,16 @@ class NotificationWithButtonsRequest(BaseModel):
     message: str = Field(..., description="Message text to send")
     buttons: Optional[List[Dict[str, str]]] = Field(None, description="List of inline keyboard buttons")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "chat_id": 1327318563,
-                "message": "Please choose an action:",
-                "buttons": [
-                    {"text": "View Details", "callback_data": "view_details"},
-                    {"text": "Mark as Read", "callback_data": "mark_read"}
-                ]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "chat_id": 1327318563,
+            "message": "Please choose an action:",
+            "buttons": [
+                {"text": "View Details", "callback_data": "view_details"},
+                {"text": "Mark as Read", "callback_data": "mark_read"}
+            ]
         }
+    })
 
 class BulkNotificationRequest(BaseModel):
     """Request model for sending notifications to multiple users"""
@@ -79,14 +157,22 @@ class BulkNotificationRequest(BaseModel):
     message: str = Field(..., description="Message text to send")
     parse_mode: Optional[str] = Field("HTML", description="Message parsing mode")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "chat_ids": [1327318563, 1234567890],
-                "message": "Bulk notification to multiple users",
-                "parse_mode": "HTML"
-            }
+    @field_validator("chat_ids")
+    @classmethod
+    def dedupe_chat_ids(cls, chat_ids: List[int]) -> List[int]:
+        """Drop repeated chat IDs (keeping first-seen order) and cap the batch size"""
+        chat_ids = list(dict.fromkeys(chat_ids))
+        if len(chat_ids) > MAX_BULK_CHAT_IDS:
+            raise ValueError(f"at most {MAX_BULK_CHAT_IDS} distinct chat IDs are allowed per request")
+        return chat_ids
+    
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "chat_ids": [1327318563, 1234567890],
+            "message": "Bulk notification to multiple users",
+            "parse_mode": "HTML"
         }
+    })
 
 class GroupRegistrationRequest(BaseModel):
     """Request model for registering a group with the bot"""
@@ -96,20 +182,19 @@ class GroupRegistrationRequest(BaseModel):
     description: Optional[str] = Field(None, description="Group description")
     topic_names: Optional[Dict[int, str]] = Field(None, description="Mapping of topic IDs to their real names")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "group_id": -1001234567890,
-                "topic_id": 12345,
-                "group_name": "Customer Support",
-                "description": "Main support group for customer inquiries",
-                "topic_names": {
-                    1: "General",
-                    2: "Customer Support",
-                    3: "Technical Issues"
-                }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "group_id": -1001234567890,
+            "topic_id": 12345,
+            "group_name": "Customer Support",
+            "description": "Main support group for customer inquiries",
+            "topic_names": {
+                1: "General",
+                2: "Customer Support",
+                3: "Technical Issues"
             }
         }
+    })
 
 class ReceiptRequest(BaseModel):
     """Request model for creating a receipt in a group topic"""
@@ -127,36 +212,132 @@ class ReceiptRequest(BaseModel):
     topic_id: Optional[int] = Field(None, description="Topic ID for posting the receipt")
     topic_name: Optional[str] = Field(None, description="Topic name for display in receipt message")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "price_deal": 1500.00,
-                "price_deposit": 500.00,
-                "date": "2024-01-15",
-                "image": "https://example.com/receipt.jpg",
-                "customer_name": "احمد محمدی",
-                "customer_phone": "+989123456789",
-                "customer_province": "تهران",
-                "customer_city": "تهران",
-                "customer_id": "CUST001",
-                "assignee": "علی فروشنده",
-                "group_id": -1001234567890,
-                "topic_id": 12345,
-                "topic_name": "Sales Department"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "price_deal": 1500.00,
+            "price_deposit": 500.00,
+            "date": "2024-01-15",
+            "image": "https://example.com/receipt.jpg",
+            "customer_name": "احمد محمدی",
+            "customer_phone": "+989123456789",
+            "customer_province": "تهران",
+            "customer_city": "تهران",
+            "customer_id": "CUST001",
+            "assignee": "علی فروشنده",
+            "group_id": -1001234567890,
+            "topic_id": 12345,
+            "topic_name": "Sales Department"
         }
+    })
 
-# Group and receipt service functions
-async def discover_group_topics_with_telethon(group_id: int) -> List[Dict[str, Any]]:
-    """Discover available topics using Telethon for real topic names"""
+# POST routes validate their bodies straight from raw bytes: pydantic-core parses the JSON
+# itself, skipping FastAPI's json.loads + dict validation round-trip
+def json_body_openapi(model: type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI requestBody for a route that reads and validates its JSON body itself"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
+
+async def parse_json_body(request: Request, model: type[BaseModel]) -> BaseModel:
+    """Decode and validate the request body in one pass (pydantic-core parses the bytes directly)"""
     try:
-        from telethon import TelegramClient
-        from telethon.tl.functions.channels import GetFullChannelRequest
-        from telethon.tl.types import InputChannel, MessageActionTopicCreate
-        from telethon.errors import FloodWaitError, ChatAdminRequiredError
+        return model.model_validate_json(await request.body())
+    except ValidationError as e:
+        # Same 422 shape FastAPI produces for declared body parameters
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+# Group metadata cache: repeat lookups within the TTL skip Telegram (least recently used entries go first)
+GROUP_METADATA_CACHE_TTL = 60.0
+GROUP_METADATA_CACHE_MAX_SIZE = 1024
+_group_metadata_cache: "OrderedDict[int, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_inflight_group_metadata: Dict[int, asyncio.Future] = {}
+
+# Chat types barely ever change, so receipts keep them longer than the full metadata
+GROUP_TYPE_CACHE_TTL = 300.0
+_group_type_cache: "OrderedDict[int, tuple[float, str]]" = OrderedDict()
+
+# Topics requested per GetForumTopicsRequest page (Telegram's maximum is 100)
+FORUM_TOPICS_PAGE_SIZE = 100
+
+# Direct Bot API access (topic probing) shares one HTTP/2 client instead of one per discovery
+TELEGRAM_API_URL = f"https://api.telegram.org/bot{config.BOT_TOKEN}"
+
+# Topic IDs probed by Bot API discovery, and how many probes may be in flight at once
+TOPIC_PROBE_MAX_ID = 1000
+TOPIC_PROBE_CONCURRENCY = 10
+# IDs probed first; if none of them exist the group is treated as having no topics
+TOPIC_PROBE_FIRST_TIER = 5
+
+_telegram_api_client: Optional[httpx.AsyncClient] = None
+
+def get_telegram_api_client() -> httpx.AsyncClient:
+    """Return the shared Bot API HTTP client, creating it on first use"""
+    global _telegram_api_client
+    if _telegram_api_client is None or _telegram_api_client.is_closed:
+        _telegram_api_client = httpx.AsyncClient(
+            base_url=TELEGRAM_API_URL,
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    return _telegram_api_client
+
+# Shared client for backend calls made from this module (auto-registration), reusing connections
+_backend_client: Optional[httpx.AsyncClient] = None
+
+def get_backend_client() -> httpx.AsyncClient:
+    """Return the shared backend HTTP client, creating it on first use"""
+    global _backend_client
+    if _backend_client is None or _backend_client.is_closed:
+        _backend_client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+    return _backend_client
+
+async def close_backend_client():
+    """Close the shared backend HTTP client if it was ever created"""
+    global _backend_client
+    if _backend_client is not None:
+        await _backend_client.aclose()
+        _backend_client = None
+
+async def close_telegram_api_client():
+    """Close the shared Bot API HTTP client if it was ever created"""
+    global _telegram_api_client
+    if _telegram_api_client is not None:
+        await _telegram_api_client.aclose()
+        _telegram_api_client = None
+
+# Fire-and-forget tasks are referenced here until they finish so they aren't garbage collected
+_background_tasks: set = set()
+
+def run_in_background(coro) -> None:
+    """Schedule a coroutine without awaiting it"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+# Group and receipt service functions
+# One Telethon user session for the whole process: connecting and authorizing happens once,
+# not on every discovery (the session file can only be opened by one client at a time anyway)
+_telethon_client = None
+_telethon_client_lock = asyncio.Lock()
+
+async def get_telethon_client():
+    """Return the shared, authorized Telethon user client, connecting it on first use"""
+    global _telethon_client
+    async with _telethon_client_lock:
+        if _telethon_client is not None and _telethon_client.is_connected():
+            return _telethon_client
         
-        logger.info(f"🔍 Starting Telethon topic discovery for group {group_id}")
-        available_topics = []
+        from telethon import TelegramClient
         
         # Initialize Telethon client with user account (not bot)
         # This requires phone number authentication for full API access
@@ -174,6 +355,7 @@ async def discover_group_topics_with_telethon(group_id: int) -> List[Dict[str, A
         # Check if we're logged in as a user (not bot)
         me = await client.get_me()
         if me.bot:
+            await client.disconnect()
             logger.error("❌ Telethon is using bot account, but we need user account for full API access")
             logger.error("❌ Please run 'python3 setup_user_auth.py' to authenticate with your personal account")
             raise Exception("Bot account cannot access forum topics. Need user account.")
@@ -181,146 +363,74 @@ async def discover_group_topics_with_telethon(group_id: int) -> List[Dict[str, A
         logger.info(f"✅ Telethon authenticated as user: {me.first_name} (@{me.username or 'no username'})")
         logger.info(f"✅ User ID: {me.id}, Is Bot: {me.bot}")
         
+        _telethon_client = client
+        return client
+
+async def close_telethon_client():
+    """Disconnect the shared Telethon client if it was ever started"""
+    global _telethon_client
+    if _telethon_client is not None:
+        await _telethon_client.disconnect()
+        _telethon_client = None
+
+def _topic_entry(topic_id: int, name: str, discovered_at: str, method: Optional[str] = None) -> Dict[str, Any]:
+    """Build the record returned for one discovered topic (discovered_at is taken once per discovery run and shared by all its topics)"""
+    entry = {"topic_id": topic_id, "name": name, "status": "active", "discovered_at": discovered_at}
+    if method:
+        entry["discovery_method"] = method
+    return entry
+
+def _ensure_general_topic(topics: List[Dict[str, Any]], seen_ids: set, discovered_at: str, method: Optional[str] = None) -> None:
+    """Prepend the General topic (topic_id=1), which always exists in groups with topics, if probing missed it"""
+    if 1 not in seen_ids:
+        topics.insert(0, _topic_entry(1, "General", discovered_at, method))
+        logger.info("✅ Added General topic (always exists in groups with topics)")
+
+async def discover_group_topics_with_telethon(group_id: int) -> List[Dict[str, Any]]:
+    """Discover available topics using Telethon for real topic names"""
+    discovered_at = datetime.now().isoformat()
+    try:
+        from telethon.tl.functions.channels import GetForumTopicsRequest
+        from telethon.tl.types import ForumTopic
+        from telethon.errors import FloodWaitError, ChatAdminRequiredError
+        
+        logger.info(f"🔍 Starting Telethon topic discovery for group {group_id}")
+        available_topics = []
+        
+        client = await get_telethon_client()
+        
         try:
             # Get the channel/group entity
             entity = await client.get_entity(group_id)
             
-            # Get full channel info which includes forum topics
-            full_channel = await client(GetFullChannelRequest(entity))
-            logger.info(f"🔍 Full channel info retrieved for group {group_id}")
-            
-            # Direct topic ID testing approach - test all possible topic IDs from 1 to 1000
-            logger.info(f"🔍 Testing all topic IDs from 1 to 1000 for group {group_id}")
-            seen_topic_ids = set()  # Track seen topic IDs to avoid duplicates
-            
-            # Optimized parallel testing - test multiple topics simultaneously
-            batch_size = 20  # Smaller batches for parallel processing
-            total_topics_tested = 0
-            
-            async def test_topic_batch(topic_ids_batch):
-                """Test a batch of topic IDs in parallel"""
-                tasks = []
-                for topic_id in topic_ids_batch:
-                    if topic_id not in seen_topic_ids:
-                        tasks.append(test_single_topic(topic_id, entity, client))
+            # Ask Telegram for the forum's topic list directly (paged, 100 topics per request)
+            # instead of probing topic IDs one by one
+            offset_date, offset_id, offset_topic = None, 0, 0
+            while True:
+                result = await client(GetForumTopicsRequest(
+                    channel=entity,
+                    offset_date=offset_date,
+                    offset_id=offset_id,
+                    offset_topic=offset_topic,
+                    limit=FORUM_TOPICS_PAGE_SIZE
+                ))
+                for topic in result.topics:
+                    # Deleted topics come back as ForumTopicDeleted, which has no title
+                    if isinstance(topic, ForumTopic):
+                        available_topics.append(_topic_entry(topic.id, topic.title, discovered_at, "telethon"))
                 
-                if tasks:
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-                    return [r for r in results if isinstance(r, dict)]  # Return only successful results
-                return []
-            
-            async def test_single_topic(topic_id, entity, client):
-                """Test a single topic ID"""
-                try:
-                    # Try to get messages from this topic to verify it exists
-                    messages = await client.get_messages(entity, limit=1, reply_to=topic_id)
-                    
-                    if messages:
-                        # Topic exists! Try to get its name
-                        topic_name = f"Topic {topic_id}"  # Default name
-                        
-                        # Try to get the topic creation message to get the real name
-                        try:
-                            topic_creation_msg = await client.get_messages(entity, ids=topic_id)
-                            if topic_creation_msg and hasattr(topic_creation_msg, 'action') and isinstance(topic_creation_msg.action, MessageActionTopicCreate):
-                                topic_name = topic_creation_msg.action.title
-                                logger.info(f"✅ Found topic {topic_id} with real name: '{topic_name}'")
-                            else:
-                                # Try to get topic name from the first message in the topic
-                                try:
-                                    first_messages = await client.get_messages(entity, limit=1, reply_to=topic_id, offset_id=0)
-                                    if first_messages:
-                                        first_msg = first_messages[0]
-                                        if hasattr(first_msg, 'action') and isinstance(first_msg.action, MessageActionTopicCreate):
-                                            topic_name = first_msg.action.title
-                                            logger.info(f"✅ Found topic {topic_id} with name from first message: '{topic_name}'")
-                                        else:
-                                            logger.info(f"🔍 Topic {topic_id} exists but using default name")
-                                    else:
-                                        logger.info(f"🔍 Topic {topic_id} exists but using default name")
-                                except Exception as e:
-                                    logger.info(f"🔍 Topic {topic_id} exists but could not get name: {e}")
-                        except Exception as e:
-                            logger.info(f"🔍 Topic {topic_id} exists but could not get creation message: {e}")
-                        
-                        # Return the topic data
-                        return {
-                            "topic_id": topic_id,
-                            "name": topic_name,
-                            "status": "active",
-                            "discovered_at": datetime.now().isoformat(),
-                            "discovery_method": "telethon"
-                        }
-                except Exception:
-                    # Topic doesn't exist or is inaccessible
-                    return None
-            
-            # Process topics in parallel batches
-            for start_id in range(1, 1001, batch_size):
-                end_id = min(start_id + batch_size - 1, 1000)
-                topic_ids_batch = list(range(start_id, end_id + 1))
-                total_topics_tested += len(topic_ids_batch)
-                
-                logger.info(f"🔍 Testing topic IDs {start_id}-{end_id} in parallel...")
-                
-                # Test this batch in parallel
-                batch_results = await test_topic_batch(topic_ids_batch)
-                
-                # Add found topics to our list
-                for topic_data in batch_results:
-                    if topic_data and topic_data["topic_id"] not in seen_topic_ids:
-                        available_topics.append(topic_data)
-                        seen_topic_ids.add(topic_data["topic_id"])
-                
-                # Log progress after each batch
-                logger.info(f"🔍 Batch {start_id}-{end_id} complete. Found {len(seen_topic_ids)} topics so far")
-                
-                # Optional: Early exit if we found a reasonable number of topics
-                # (uncomment the next 3 lines if you want to stop after finding 20 topics)
-                # if len(seen_topic_ids) >= 20:
-                #     logger.info(f"🔍 Found {len(seen_topic_ids)} topics, stopping early for efficiency")
-                #     break
-                
-                # Small delay between batches to avoid overwhelming the API
-                await asyncio.sleep(0.05)  # Reduced delay for faster processing
+                if len(result.topics) < FORUM_TOPICS_PAGE_SIZE or len(available_topics) >= result.count:
+                    break
+                last_topic = result.topics[-1]
+                if not isinstance(last_topic, ForumTopic):
+                    break
+                # Topics are ordered by their latest (top) message, so the next page starts from that
+                # message's date; the topic's own date is when it was created
+                top_message = next((m for m in result.messages if m.id == last_topic.top_message), None)
+                offset_date = top_message.date if top_message is not None else last_topic.date
+                offset_id, offset_topic = last_topic.top_message, last_topic.id
             
-            logger.info(f"🔍 Topic ID testing complete. Tested {total_topics_tested} topic IDs, found {len(seen_topic_ids)} active topics")
-            
-            # Only add General topic if it actually exists and is accessible
-            # Don't assume it exists just because topics are enabled
-            general_topic_found = any(topic["topic_id"] == 1 for topic in available_topics)
-            if not general_topic_found:
-                # Try to verify if General topic actually exists by testing access to it
-                try:
-                    # Try to get a recent message from General topic to verify it exists
-                    general_messages = await client.get_messages(entity, limit=1, reply_to=1)
-                    if general_messages:
-                        # General topic exists, try to get its real name
-                        general_topic_name = "General"  # Default name
-                        
-                        try:
-                            # Try to get the General topic creation message
-                            general_creation_msg = await client.get_messages(entity, ids=1)
-                            if general_creation_msg and hasattr(general_creation_msg, 'action') and isinstance(general_creation_msg.action, MessageActionTopicCreate):
-                                general_topic_name = general_creation_msg.action.title
-                                logger.info(f"✅ Found real General topic name: '{general_topic_name}'")
-                            else:
-                                logger.info(f"🔍 Could not find General topic creation message, using default name")
-                        except Exception as e:
-                            logger.info(f"🔍 Could not get General topic name: {e}")
-                        
-                        available_topics.insert(0, {
-                            "topic_id": 1,
-                            "name": general_topic_name,
-                            "status": "active",
-                            "discovered_at": datetime.now().isoformat(),
-                            "discovery_method": "telethon"
-                        })
-                        logger.info(f"✅ Added General topic with name: '{general_topic_name}'")
-                    else:
-                        logger.info(f"🔍 General topic not accessible or doesn't exist, skipping")
-                except Exception as e:
-                    logger.info(f"🔍 General topic not accessible or doesn't exist: {e}")
+            logger.info(f"🔍 Forum topic list retrieved for group {group_id}: {len(available_topics)} topics")
             
         except FloodWaitError as e:
             logger.warning(f"⚠️ FloodWait: {e}")
@@ -330,57 +440,10 @@ async def discover_group_topics_with_telethon(group_id: int) -> List[Dict[str, A
         except Exception as e:
             logger.error(f"❌ Error getting channel info: {e}")
             logger.info(f"🔄 Telethon failed, falling back to Bot API method...")
-            await client.disconnect()
             return await discover_group_topics_with_telegram_api(group_id)
         
-        finally:
-            await client.disconnect()
-        
-        # Final deduplication - remove any remaining duplicates by topic_id
-        unique_topics = []
-        seen_ids = set()
-        for topic in available_topics:
-            if topic["topic_id"] not in seen_ids:
-                unique_topics.append(topic)
-                seen_ids.add(topic["topic_id"])
-        
-        logger.info(f"📋 Telethon topic discovery completed. Found {len(unique_topics)} unique topics")
-        
-        # If we found very few topics, try additional discovery methods
-        if len(unique_topics) < 10:  # If we found less than 10 topics, try additional methods
-            logger.info(f"🔍 Found only {len(unique_topics)} topics with Telethon, trying additional discovery methods...")
-            
-            # Try Bot API method
-            try:
-                bot_api_topics = await discover_group_topics_with_telegram_api(group_id)
-                # Merge topics, avoiding duplicates
-                existing_ids = {t["topic_id"] for t in unique_topics}
-                for topic in bot_api_topics:
-                    if topic["topic_id"] not in existing_ids:
-                        unique_topics.append(topic)
-                        logger.info(f"✅ Added topic {topic['topic_id']} from Bot API: '{topic['name']}'")
-                
-                logger.info(f"📋 Bot API discovery added {len(bot_api_topics)} topics. Total: {len(unique_topics)}")
-            except Exception as e:
-                logger.info(f"🔍 Bot API discovery failed: {e}")
-            
-            # Try Aiogram method as well
-            try:
-                aiogram_topics = await discover_group_topics_aiogram(group_id)
-                # Merge topics, avoiding duplicates
-                existing_ids = {t["topic_id"] for t in unique_topics}
-                for topic in aiogram_topics:
-                    if topic["topic_id"] not in existing_ids:
-                        unique_topics.append(topic)
-                        logger.info(f"✅ Added topic {topic['topic_id']} from Aiogram: '{topic['name']}'")
-                
-                logger.info(f"📋 Aiogram discovery added {len(aiogram_topics)} topics. Total: {len(unique_topics)}")
-            except Exception as e:
-                logger.info(f"🔍 Aiogram discovery failed: {e}")
-            
-            logger.info(f"📋 Combined discovery completed. Total topics: {len(unique_topics)}")
-        
-        return unique_topics
+        logger.info(f"📋 Telethon topic discovery completed. Found {len(available_topics)} topics")
+        return available_topics
         
     except Exception as e:
         logger.error(f"❌ Error during Telethon topic discovery for group {group_id}: {e}")
@@ -390,43 +453,35 @@ async def discover_group_topics_with_telethon(group_id: int) -> List[Dict[str, A
 
 async def discover_group_topics_with_telegram_api(group_id: int) -> List[Dict[str, Any]]:
     """Discover available topics using direct Telegram Bot API calls"""
+    discovered_at = datetime.now().isoformat()
     try:
-        import httpx
-        
         logger.info(f"🔍 Starting Telegram API topic discovery for group {group_id}")
-        available_topics = []
         
-        # Test all possible topic IDs from 1 to 1000
+        # Test all possible topic IDs from 1 to TOPIC_PROBE_MAX_ID
         # This ensures we don't miss any topics
-        common_topic_ids = list(range(1, 1001))  # Test IDs 1-1000
+        client = get_telegram_api_client()
+        semaphore = asyncio.Semaphore(TOPIC_PROBE_CONCURRENCY)
         
-        # Process topics in parallel batches for faster discovery
-        batch_size = 10  # Smaller batches for parallel processing
-        total_tested = 0
-        
-        async def test_topic_batch_api(topic_ids_batch, client):
-            """Test a batch of topic IDs in parallel using Bot API"""
-            tasks = []
-            for topic_id in topic_ids_batch:
-                tasks.append(test_single_topic_api(topic_id, group_id, client))
-            
-            if tasks:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                return [r for r in results if isinstance(r, dict)]  # Return only successful results
-            return []
+        async def delete_probe_message(message_id: int):
+            """Remove a probe message once its topic has been confirmed"""
+            try:
+                await client.post("/deleteMessage", json={"chat_id": group_id, "message_id": message_id})
+            except httpx.HTTPError as e:
+                logger.debug(f"Could not delete probe message {message_id} in group {group_id}: {e}")
         
-        async def test_single_topic_api(topic_id, group_id, client):
+        async def test_single_topic_api(topic_id: int) -> Optional[Dict[str, Any]]:
             """Test a single topic ID using Bot API"""
             try:
-                # Send a test message to the topic
-                send_response = await client.post(
-                    f"https://api.telegram.org/bot{config.BOT_TOKEN}/sendMessage",
-                    json={
-                        "chat_id": group_id,
-                        "text": "🔍",
-                        "message_thread_id": topic_id
-                    }
-                )
+                async with semaphore:
+                    # Send a test message to the topic
+                    send_response = await client.post(
+                        "/sendMessage",
+                        json={
+                            "chat_id": group_id,
+                            "text": "🔍",
+                            "message_thread_id": topic_id
+                        }
+                    )
                 
                 if send_response.status_code == 200:
                     message_data = send_response.json()
@@ -434,6 +489,10 @@ async def discover_group_topics_with_telegram_api(group_id: int) -> List[Dict[st
                         message_info = message_data.get("result", {})
                         topic_name = f"Topic {topic_id}"  # Default name
                         
+                        # Clean up the probe without waiting for it
+                        if "message_id" in message_info:
+                            run_in_background(delete_probe_message(message_info["message_id"]))
+                        
                         # Try to extract topic name from the message info
                         # The message might contain thread information
                         if "reply_to_message" in message_info:
@@ -444,57 +503,40 @@ async def discover_group_topics_with_telegram_api(group_id: int) -> List[Dict[st
                                     topic_name = thread_info["name"]
                                     logger.info(f"✅ Extracted topic name from API: '{topic_name}'")
                         
-                        # Return topic data instead of appending to global list
-                        return {
-                            "topic_id": topic_id,
-                            "name": topic_name,
-                            "status": "active",
-                            "discovered_at": datetime.now().isoformat(),
-                            "discovery_method": "telegram_api"
-                        }
+                        return _topic_entry(topic_id, topic_name, discovered_at, "telegram_api")
                     else:
-                        logger.info(f"❌ Topic {topic_id} not available: {message_data.get('description', 'Unknown error')}")
+                        logger.debug(f"❌ Topic {topic_id} not available: {message_data.get('description', 'Unknown error')}")
                 else:
-                    logger.info(f"❌ Topic {topic_id} not available: HTTP {send_response.status_code}")
+                    logger.debug(f"❌ Topic {topic_id} not available: HTTP {send_response.status_code}")
                         
             except Exception as e:
-                logger.info(f"❌ Topic {topic_id} not available: {e}")
+                logger.debug(f"❌ Topic {topic_id} not available: {e}")
             
             return None
         
-        async with httpx.AsyncClient() as client:
-            # Process topics in parallel batches
-            for start_id in range(1, 1001, batch_size):
-                end_id = min(start_id + batch_size - 1, 1000)
-                topic_ids_batch = list(range(start_id, end_id + 1))
-                total_tested += len(topic_ids_batch)
-                
-                # Only log every 10 batches to reduce spam
-                if start_id % 100 == 1 or start_id <= 50:
-                    logger.info(f"🔍 Bot API: Testing topic IDs {start_id}-{end_id} in parallel...")
-                
-                # Test this batch in parallel
-                batch_results = await test_topic_batch_api(topic_ids_batch, client)
-                
-                # Add found topics to our list
-                for topic_data in batch_results:
-                    if topic_data:
-                        available_topics.append(topic_data)
-                        logger.info(f"✅ Found topic {topic_data['topic_id']} with name: '{topic_data['name']}'")
-                
-                # Small delay between batches
-                await asyncio.sleep(0.05)
-        
-        # Always add General topic (topic_id=1) if topics are enabled
-        if not any(topic["topic_id"] == 1 for topic in available_topics):
-            available_topics.insert(0, {
-                "topic_id": 1,
-                "name": "General",
-                "status": "active",
-                "discovered_at": datetime.now().isoformat(),
-                "discovery_method": "telegram_api"
-            })
-            logger.info("✅ Added General topic (always exists in groups with topics)")
+        # Probe topic IDs concurrently over the shared connection (bounded by the semaphore).
+        # The low IDs go first: if none of them exist, skip the remaining probes (same cut-off
+        # as the aiogram loop's "no topics after ID 5" check)
+        results = await asyncio.gather(
+            *(test_single_topic_api(topic_id) for topic_id in range(1, TOPIC_PROBE_FIRST_TIER + 1)),
+            return_exceptions=True
+        )
+        if any(isinstance(topic_data, dict) for topic_data in results):
+            results += await asyncio.gather(
+                *(test_single_topic_api(topic_id) for topic_id in range(TOPIC_PROBE_FIRST_TIER + 1, TOPIC_PROBE_MAX_ID + 1)),
+                return_exceptions=True
+            )
+        else:
+            logger.info(f"No topics among IDs 1-{TOPIC_PROBE_FIRST_TIER}, skipping the remaining probes")
+        available_topics = []
+        seen_ids = set()
+        for topic_data in results:
+            if isinstance(topic_data, dict):
+                available_topics.append(topic_data)
+                seen_ids.add(topic_data["topic_id"])
+                logger.info(f"✅ Found topic {topic_data['topic_id']} with name: '{topic_data['name']}'")
+        
+        _ensure_general_topic(available_topics, seen_ids, discovered_at, "telegram_api")
         
         logger.info(f"📋 Telegram API topic discovery completed. Found {len(available_topics)} topics")
         return available_topics
@@ -507,18 +549,23 @@ async def discover_group_topics_with_telegram_api(group_id: int) -> List[Dict[st
 
 async def discover_group_topics_aiogram(group_id: int) -> List[Dict[str, Any]]:
     """Discover available topics in a group using aiogram 3.x compatible methods"""
+    discovered_at = datetime.now().isoformat()
     try:
-        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-        import httpx
-        
         logger.info(f"🔍 Starting topic discovery for group {group_id}")
         available_topics = []
+        seen_ids = set()
         
-        # Test all possible topic IDs from 1 to 1000
-        # This ensures we don't miss any topics
-        common_topic_ids = list(range(1, 1001))  # Test IDs 1-1000
+        async def delete_test_message(message_id: int, topic_id: int):
+            """Best-effort removal of a probe message"""
+            try:
+                await bot.delete_message(chat_id=group_id, message_id=message_id)
+                logger.info(f"✅ Cleaned up test message for topic {topic_id}")
+            except Exception as e:
+                logger.warning(f"Could not delete test message for topic {topic_id}: {e}")
         
-        for topic_id in common_topic_ids:
+        # Test all possible topic IDs from 1 to TOPIC_PROBE_MAX_ID
+        # This ensures we don't miss any topics
+        for topic_id in range(1, TOPIC_PROBE_MAX_ID + 1):
             try:
                 # Only log every 50 topics to reduce spam
                 if topic_id % 50 == 1 or topic_id <= 10:
@@ -526,91 +573,41 @@ async def discover_group_topics_aiogram(group_id: int) -> List[Dict[str, Any]]:
                 
                 # Try to send a test message to the topic to see if it exists
                 # This is the most reliable way to test topic existence in aiogram 3.x
-                test_message = await bot.send_message(
-                    chat_id=group_id,
-                    text="🔍",  # Minimal test message
-                    message_thread_id=topic_id
-                )
+                # (probes skip the group's message budget so they don't wait minutes or starve receipts)
+                with exempt_from_group_limit():
+                    test_message = await bot.send_message(
+                        chat_id=group_id,
+                        text="🔍",  # Minimal test message
+                        message_thread_id=topic_id
+                    )
                 
                 if test_message:
-                    # Message sent successfully, topic exists
-                    topic_name = f"Topic {topic_id}"  # Default name
-                    
-                    # Try to get the real topic name from the first message in the topic
-                    try:
-                        # The message object might contain thread info
-                        if hasattr(test_message, 'message_thread_id') and test_message.message_thread_id:
-                            logger.info(f"✅ Found topic {topic_id} with thread_id: {test_message.message_thread_id}")
-                        
-                        # Try to extract topic name from message thread info
-                        if hasattr(test_message, 'message_thread_info') and test_message.message_thread_info:
-                            thread_info = test_message.message_thread_info
-                            logger.info(f"🔍 Thread info found: {thread_info}")
-                            
-                            # Try different attributes that might contain the topic name
-                            if hasattr(thread_info, 'name') and thread_info.name:
-                                topic_name = thread_info.name
-                                logger.info(f"✅ Extracted topic name from thread_info.name: '{topic_name}'")
-                            elif hasattr(thread_info, 'title') and thread_info.title:
-                                topic_name = thread_info.title
-                                logger.info(f"✅ Extracted topic name from thread_info.title: '{topic_name}'")
-                            else:
-                                logger.info(f"🔍 Thread info available but no name/title found: {dir(thread_info)}")
-                        else:
-                            logger.info(f"🔍 No message_thread_info found in message: {dir(test_message)}")
-                        
-                        # If we still have default name, try to get it from the message itself
-                        if topic_name == f"Topic {topic_id}":
-                            # Try to get the message content or other attributes
-                            logger.info(f"🔍 Message attributes: {[attr for attr in dir(test_message) if not attr.startswith('_')]}")
-                            
-                            # Check if there's any way to get topic name from the message
-                            if hasattr(test_message, 'reply_to_message') and test_message.reply_to_message:
-                                reply_msg = test_message.reply_to_message
-                                logger.info(f"🔍 Reply message found: {reply_msg}")
-                        
-                        logger.info(f"✅ Found topic {topic_id} with name: '{topic_name}'")
-                        
-                    except Exception as e:
-                        logger.info(f"✅ Found topic {topic_id} but couldn't get name: {e}")
+                    # Message sent successfully, topic exists; use the thread's name when Telegram includes it
+                    thread_info = getattr(test_message, "message_thread_info", None)
+                    topic_name = (
+                        getattr(thread_info, "name", None)
+                        or getattr(thread_info, "title", None)
+                        or f"Topic {topic_id}"
+                    )
+                    logger.info(f"✅ Found topic {topic_id} with name: '{topic_name}'")
                     
-                    available_topics.append({
-                        "topic_id": topic_id,
-                        "name": topic_name,
-                        "status": "active",
-                        "discovered_at": datetime.now().isoformat()
-                    })
+                    available_topics.append(_topic_entry(topic_id, topic_name, discovered_at))
+                    seen_ids.add(topic_id)
                     
-                    # Clean up test message
-                    try:
-                        await bot.delete_message(
-                            chat_id=group_id,
-                            message_id=test_message.message_id
-                        )
-                        logger.info(f"✅ Cleaned up test message for topic {topic_id}")
-                    except Exception as e:
-                        logger.warning(f"Could not delete test message for topic {topic_id}: {e}")
+                    # Clean up test message in the background; the next probe doesn't wait for it
+                    run_in_background(delete_test_message(test_message.message_id, topic_id))
                 
             except TelegramBadRequest as e:
-                logger.info(f"❌ Topic {topic_id} not available: {e}")
+                logger.debug(f"❌ Topic {topic_id} not available: {e}")
                 # Stop testing if we get consecutive failures
-                if len(available_topics) == 0 and topic_id > 5:
+                if len(available_topics) == 0 and topic_id > TOPIC_PROBE_FIRST_TIER:
                     break
             except Exception as e:
                 logger.warning(f"⚠️ Error testing topic {topic_id}: {e}")
                 # Continue with next topic
                 continue
         
-        # Always add General topic (topic_id=1) if topics are enabled
-        # because General topic always exists in groups with topics
-        if not any(topic["topic_id"] == 1 for topic in available_topics):
-            available_topics.insert(0, {
-                "topic_id": 1,
-                "name": "General",
-                "status": "active",
-                "discovered_at": datetime.now().isoformat()
-            })
-            logger.info("✅ Added General topic (always exists in groups with topics)")
+        _ensure_general_topic(available_topics, seen_ids, discovered_at)
         
         logger.info(f"📋 Topic discovery completed. Found {len(available_topics)} topics")
         return available_topics
@@ -618,26 +615,79 @@ async def discover_group_topics_aiogram(group_id: int) -> List[Dict[str, Any]]:
     except Exception as e:
         logger.error(f"❌ Error during topic discovery for group {group_id}: {e}")
         # Return at least the General topic if topics are enabled
-        return [{
-            "topic_id": 1,
-            "name": "General",
-            "status": "active",
-            "discovered_at": datetime.now().isoformat(),
-            "error": f"Discovery failed: {str(e)}"
-        }]
+        return [{**_topic_entry(1, "General", discovered_at), "error": f"Discovery failed: {str(e)}"}]
+
+def invalidate_group_metadata(group_id: int) -> None:
+    """Forget cached metadata for a group so the next fetch goes to Telegram"""
+    _group_metadata_cache.pop(group_id, None)
+    _inflight_group_metadata.pop(group_id, None)
+    _group_type_cache.pop(group_id, None)
+
+async def fetch_group_type(group_id: int) -> str:
+    """Chat type of a group, cached; costs at most one get_chat call instead of a full metadata fetch"""
+    now = time.monotonic()
+    cached = _group_type_cache.get(group_id)
+    if cached is not None and cached[0] > now:
+        _group_type_cache.move_to_end(group_id)
+        return cached[1]
+    
+    metadata = _group_metadata_cache.get(group_id)
+    if metadata is not None and metadata[0] > now:
+        chat_type = metadata[1].get("type", "unknown")
+    else:
+        chat_type = (await bot.get_chat(group_id)).type
+    _group_type_cache[group_id] = (now + GROUP_TYPE_CACHE_TTL, chat_type)
+    _group_type_cache.move_to_end(group_id)
+    if len(_group_type_cache) > GROUP_METADATA_CACHE_MAX_SIZE:
+        _group_type_cache.popitem(last=False)
+    return chat_type
 
 async def fetch_group_metadata(group_id: int) -> Dict[str, Any]:
+    """Fetch group metadata, served from a short-lived cache when possible (each caller gets its own copy)"""
+    cached = _group_metadata_cache.get(group_id)
+    if cached is not None and cached[0] > time.monotonic():
+        _group_metadata_cache.move_to_end(group_id)
+        return copy.deepcopy(cached[1])
+    
+    # Concurrent requests for the same group share one fetch
+    task = _inflight_group_metadata.get(group_id)
+    if task is None:
+        task = asyncio.ensure_future(_load_group_metadata(group_id))
+        _inflight_group_metadata[group_id] = task
+        task.add_done_callback(
+            lambda done: _inflight_group_metadata.pop(group_id, None)
+            if _inflight_group_metadata.get(group_id) is done else None
+        )
+    return copy.deepcopy(await asyncio.shield(task))
+
+async def _load_group_metadata(group_id: int) -> Dict[str, Any]:
+    """Fetch metadata from Telegram and cache it unless the group was invalidated meanwhile"""
+    metadata = await fetch_group_metadata_from_telegram(group_id)
+    if _inflight_group_metadata.get(group_id) is asyncio.current_task():
+        _group_metadata_cache[group_id] = (time.monotonic() + GROUP_METADATA_CACHE_TTL, metadata)
+        _group_metadata_cache.move_to_end(group_id)
+        if len(_group_metadata_cache) > GROUP_METADATA_CACHE_MAX_SIZE:
+            _group_metadata_cache.popitem(last=False)
+    return metadata
+
+async def fetch_group_metadata_from_telegram(group_id: int) -> Dict[str, Any]:
     """Fetch group metadata from Telegram API"""
     try:
-        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-        
-        # Get basic chat information
-        chat = await bot.get_chat(group_id)
+        # Get basic chat information, administrators and member count concurrently
+        chat, admins, member_count = await asyncio.gather(
+            bot.get_chat(group_id),
+            bot.get_chat_administrators(group_id),
+            bot.get_chat_member_count(group_id),
+            return_exceptions=True
+        )
+        if isinstance(chat, BaseException):
+            raise chat
         
         # Get chat administrators
         administrators = []
-        try:
-            admins = await bot.get_chat_administrators(group_id)
+        if isinstance(admins, BaseException):
+            logger.warning(f"Could not fetch administrators for group {group_id}: {admins}")
+        else:
             administrators = [
                 {
                     "user_id": admin.user.id,
@@ -647,15 +697,11 @@ async def fetch_group_metadata(group_id: int) -> Dict[str, Any]:
                 }
                 for admin in admins
             ]
-        except Exception as e:
-            logger.warning(f"Could not fetch administrators for group {group_id}: {e}")
         
         # Get member count
-        member_count = 0
-        try:
-            member_count = await bot.get_chat_member_count(group_id)
-        except Exception as e:
-            logger.warning(f"Could not fetch member count for group {group_id}: {e}")
+        if isinstance(member_count, BaseException):
+            logger.warning(f"Could not fetch member count for group {group_id}: {member_count}")
+            member_count = 0
         
         # Check if topics are enabled in the group (simple check)
         has_topics_enabled = False
@@ -684,7 +730,10 @@ async def fetch_group_metadata(group_id: int) -> Dict[str, Any]:
             logger.info(f"🔍 Discovering available topics for group {group_id}...")
             # Use Telethon for topic discovery (Telethon has bot restrictions)
             # For real topic names, users can manually configure them in the backend
-            available_topics = await discover_group_topics_with_telethon(group_id)
+            if WEBHOOK_SERVER_PROCESS:
+                available_topics = await discover_group_topics_with_telegram_api(group_id)
+            else:
+                available_topics = await discover_group_topics_with_telethon(group_id)
             logger.info(f"📋 Discovered {len(available_topics)} topics: {[t['topic_id'] for t in available_topics]}")
         
         metadata = {
@@ -729,41 +778,16 @@ async def fetch_group_metadata(group_id: int) -> Dict[str, Any]:
         logger.error(f"Unexpected error when fetching group {group_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-async def check_topic_exists(group_id: int, topic_id: int) -> bool:
-    """Check if a topic exists in a group by trying to send a test message"""
-    try:
-        # Try to send a very short test message to the topic
-        test_message = await bot.send_message(
-            chat_id=group_id,
-            message_thread_id=topic_id,
-            text=".",
-            parse_mode="HTML"
-        )
-        # If successful, delete the test message
-        try:
-            await bot.delete_message(chat_id=group_id, message_id=test_message.message_id)
-        except:
-            pass  # Ignore if deletion fails
-        return True
-    except Exception as e:
-        error_msg = str(e).lower()
-        # Check if topic is closed (not deleted)
-        if "topic_closed" in error_msg or "topic closed" in error_msg:
-            logger.info(f"Topic {topic_id} exists but is closed")
-            return True  # Topic exists but is closed
-        else:
-            logger.info(f"Topic {topic_id} does not exist or is not accessible: {e}")
-            return False
-
 async def is_topic_closed(group_id: int, topic_id: int) -> bool:
     """Check if a topic is closed (exists but not accessible for posting)"""
     try:
-        # Try to send a test message to the topic
-        await bot.send_message(
-            chat_id=group_id,
-            text="🔍",  # Minimal test message
-            message_thread_id=topic_id
-        )
+        # Try to send a test message to the topic (outside the group's message budget)
+        with exempt_from_group_limit():
+            await bot.send_message(
+                chat_id=group_id,
+                text="🔍",  # Minimal test message
+                message_thread_id=topic_id
+            )
         return False  # If message sent successfully, topic is not closed
     except Exception as e:
         error_msg = str(e).lower()
@@ -796,39 +820,20 @@ async def find_open_topic_for_message(group_id: int, available_topics: List[Dict
     logger.info("No open topics found, will send to main group")
     return None
 
-async def send_receipt_to_group(
-    group_id: int,
-    topic_id: Optional[int],
-    receipt_data: ReceiptRequest
-) -> Dict[str, Any]:
-    """Send receipt message to group topic"""
-    try:
-        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-        
-        # Format the receipt message
-        remaining_amount = receipt_data.price_deal - receipt_data.price_deposit
-        
-        # Create hashtag for assignee (replace spaces with underscores and add #)
-        assignee_hashtag = f"#{receipt_data.assignee.replace(' ', '_')}"
-        
-        # Create simple Telegram ID with @
-        telegram_id_mention = ""
-        if receipt_data.customer_id:
-            telegram_id_mention = f'🔗 <b>آیدی:</b> @{receipt_data.customer_id}'
-        
-        message = f"""💠💎💠💎💠💎💠💎
+# Receipt layout posted to groups; optional lines are filled in (or left empty) per receipt
+RECEIPT_TEMPLATE = """💠💎💠💎💠💎💠💎
 
-👤 <b>نام:</b> {receipt_data.customer_name}
-📞 <b>شماره:</b> {receipt_data.customer_phone}
-{'🗺 <b>استان:</b> ' + receipt_data.customer_province if receipt_data.customer_province else ''}
-{'🏡 <b>شهر:</b> ' + receipt_data.customer_city if receipt_data.customer_city else ''}
-{telegram_id_mention}
-📅 <b>تاریخ:</b> {receipt_data.date}
+👤 <b>نام:</b> {customer_name}
+📞 <b>شماره:</b> {customer_phone}
+{province_line}
+{city_line}
+{telegram_id_line}
+📅 <b>تاریخ:</b> {date}
 
 💰 — — — — — — — 💰
 
-💲 <b>مبلغ کل:</b> {receipt_data.price_deal:,.0f} تومان
-💵 <b>مبلغ واریزی:</b> {receipt_data.price_deposit:,.0f} تومان
+💲 <b>مبلغ کل:</b> {price_deal:,.0f} تومان
+💵 <b>مبلغ واریزی:</b> {price_deposit:,.0f} تومان
 
 💰 — — — — — — — 💰
 
@@ -836,8 +841,32 @@ async def send_receipt_to_group(
 
 💠💎💠💎💠💎💠💎
 
-{'📷 <b>تصویر رسید:</b> ضمیمه شده' if receipt_data.image else ''}
-{'🏷️ <b>موضوع:</b> ' + receipt_data.topic_name if receipt_data.topic_name else ''}"""
+{image_line}
+{topic_line}"""
+RECEIPT_IMAGE_LINE = "📷 <b>تصویر رسید:</b> ضمیمه شده"
+
+async def send_receipt_to_group(
+    group_id: int,
+    topic_id: Optional[int],
+    receipt_data: ReceiptRequest
+) -> Dict[str, Any]:
+    """Send receipt message to group topic"""
+    try:
+        # Format the receipt message; optional fields become empty lines when missing
+        message = RECEIPT_TEMPLATE.format(
+            customer_name=receipt_data.customer_name,
+            customer_phone=receipt_data.customer_phone,
+            province_line=f"🗺 <b>استان:</b> {receipt_data.customer_province}" if receipt_data.customer_province else "",
+            city_line=f"🏡 <b>شهر:</b> {receipt_data.customer_city}" if receipt_data.customer_city else "",
+            telegram_id_line=f"🔗 <b>آیدی:</b> @{receipt_data.customer_id}" if receipt_data.customer_id else "",
+            date=receipt_data.date,
+            price_deal=receipt_data.price_deal,
+            price_deposit=receipt_data.price_deposit,
+            # Hashtag for the assignee (spaces replaced with underscores)
+            assignee_hashtag=f"#{receipt_data.assignee.replace(' ', '_')}",
+            image_line=RECEIPT_IMAGE_LINE if receipt_data.image else "",
+            topic_line=f"🏷️ <b>موضوع:</b> {receipt_data.topic_name}" if receipt_data.topic_name else ""
+        )
         
         # Send message to group/topic
         # Only use message_thread_id for groups/supergroups, not channels
@@ -846,16 +875,11 @@ async def send_receipt_to_group(
             "parse_mode": "HTML"
         }
         
-        # Only add message_thread_id if it's provided (for groups with topics)
+        # Only add message_thread_id if it's provided (for groups with topics). There's no
+        # pre-flight probe: a missing topic fails the send with "message thread not found",
+        # and the TelegramBadRequest handler below resends to the main group
         if topic_id is not None:
-            # Check if topic exists before trying to send
-            topic_exists = await check_topic_exists(group_id, topic_id)
-            if topic_exists:
-                send_params["message_thread_id"] = topic_id
-                logger.info(f"Topic {topic_id} exists, sending to topic")
-            else:
-                logger.warning(f"Topic {topic_id} does not exist, sending to main group instead")
-                topic_id = None  # Remove topic_id to send to main group
+            send_params["message_thread_id"] = topic_id
         
         # If there's an image, send as photo with caption, otherwise send as text message
         if receipt_data.image and receipt_data.image.startswith('http'):
@@ -866,6 +890,9 @@ async def send_receipt_to_group(
                 photo_params["caption"] = message
                 sent_message = await bot.send_photo(**photo_params)
             except Exception as e:
+                # A missing topic fails the text send too; go straight to the main-group fallback
+                if isinstance(e, TelegramBadRequest) and "message thread not found" in str(e).lower():
+                    raise
                 logger.error(f"Could not send image, falling back to text: {e}")
                 # Fallback to text message if image fails - remove photo param
                 text_params = send_params.copy()
@@ -888,18 +915,26 @@ async def send_receipt_to_group(
         
     except TelegramBadRequest as e:
         logger.error(f"Bad request when sending receipt to group {group_id}: {e}")
+        # The group may have been migrated or removed; don't keep serving its cached type
+        invalidate_group_metadata(group_id)
         
         # If it's a "message thread not found" error and we have a topic_id, try without topic
         if "message thread not found" in str(e).lower() and topic_id is not None:
             logger.info(f"Topic {topic_id} not found, attempting to send to main group without topic")
             try:
-                # Remove topic_id and try again
+                # Remove topic_id and send the same kind of message again (photo receipts stay photos)
                 fallback_params = {
                     "chat_id": group_id,
-                    "parse_mode": "HTML",
-                    "text": message
+                    "parse_mode": "HTML"
                 }
-                sent_message = await bot.send_message(**fallback_params)
+                if receipt_data.image and receipt_data.image.startswith('http'):
+                    try:
+                        sent_message = await bot.send_photo(**fallback_params, photo=receipt_data.image, caption=message)
+                    except Exception as photo_error:
+                        logger.error(f"Could not send image, falling back to text: {photo_error}")
+                        sent_message = await bot.send_message(**fallback_params, text=message)
+                else:
+                    sent_message = await bot.send_message(**fallback_params, text=message)
                 
                 logger.info(f"Successfully sent receipt to main group {group_id} (topic fallback)")
                 return {
@@ -921,6 +956,7 @@ async def send_receipt_to_group(
         
     except TelegramForbiddenError as e:
         logger.error(f"Forbidden when sending receipt to group {group_id}: {e}")
+        invalidate_group_metadata(group_id)
         return {
             "success": False,
             "error": "Bot doesn't have permission to send messages to this group",
@@ -938,8 +974,6 @@ async def send_receipt_to_group(
 async def check_and_promote_bot_permissions(group_id: int) -> bool:
     """Check if bot has admin rights and try to promote if possible"""
     try:
-        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-        
         # Get bot's current status in the group
         try:
             bot_member = await bot.get_chat_member(group_id, bot.id)
@@ -977,23 +1011,19 @@ async def auto_register_group_to_backend(group_metadata: Dict[str, Any]) -> bool
         }
         
         logger.info(f"Sending complete group metadata for group {group_metadata.get('group_id')} to backend")
-        logger.info(f"Data structure: {json.dumps(response_data, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Data structure: {json.dumps(response_data, indent=2, ensure_ascii=False)}")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                config.AUTO_REGISTER_ENDPOINT,
-                json=response_data,
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                backend_response = response.json()
-                logger.info(f"Successfully saved group metadata for group {group_metadata.get('group_id')} to backend")
-                logger.info(f"Backend response: {backend_response}")
-                return True
-            else:
-                logger.error(f"Backend save failed: {response.status_code} - {response.text}")
-                return False
+        response = await get_backend_client().post(config.AUTO_REGISTER_ENDPOINT, json=response_data)
+        
+        if response.status_code == 200:
+            backend_response = response.json()
+            logger.info(f"Successfully saved group metadata for group {group_metadata.get('group_id')} to backend")
+            logger.info(f"Backend response: {backend_response}")
+            return True
+        else:
+            logger.error(f"Backend save failed: {response.status_code} - {response.text}")
+            return False
                 
     except Exception as e:
         logger.error(f"Error saving group metadata to backend: {e}")
@@ -1008,8 +1038,6 @@ async def send_notification(
 ) -> Dict[str, Any]:
     """Send a notification message to a specific Telegram user"""
     try:
-        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-        
         sent_message = await bot.send_message(
             chat_id=chat_id,
             text=message,
@@ -1017,7 +1045,8 @@ async def send_notification(
             reply_markup=reply_markup
         )
         
-        logger.info(f"Successfully sent notification to chat_id {chat_id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Successfully sent notification to chat_id {chat_id}")
         
         return {
             "success": True,
@@ -1054,6 +1083,14 @@ async def send_notification(
             "details": str(e)
         }
 
+@lru_cache(maxsize=1024)
+def build_buttons_markup(buttons: tuple) -> InlineKeyboardMarkup:
+    """One-row inline keyboard for (text, callback_data) pairs; recurring button sets reuse the cached markup"""
+    # Fields are already validated strings from the request model, so skip re-validation
+    make_button = InlineKeyboardButton.model_construct
+    keyboard_buttons = [make_button(text=text, callback_data=callback_data) for text, callback_data in buttons]
+    return InlineKeyboardMarkup.model_construct(inline_keyboard=[keyboard_buttons])
+
 # FastAPI routes
 @app.get("/")
 async def root():
@@ -1069,145 +1106,195 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Bot and webhook server are running"}
 
-@app.post("/webhook/notify")
-async def webhook_notify(request: NotificationRequest):
+@app.post("/webhook/notify", response_model=None, openapi_extra=json_body_openapi(NotificationRequest))
+async def webhook_notify(raw_request: Request):
     """Send a notification to a specific Telegram user"""
-    try:
-        logger.info(f"Received notification request for chat_id: {request.chat_id}")
-        logger.info(f"Message content: {request.message}")
-        logger.info(f"Parse mode: {request.parse_mode}")
-        
-        result = await send_notification(
-            chat_id=request.chat_id,
-            message=request.message,
-            parse_mode=request.parse_mode
-        )
+    request = await parse_json_body(raw_request, NotificationRequest)
+    
+    logger.info(f"Received notification request for chat_id: {request.chat_id}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Message content: {request.message}")
+        logger.debug(f"Parse mode: {request.parse_mode}")
+    
+    result = await send_notification(
+        chat_id=request.chat_id,
+        message=request.message,
+        parse_mode=request.parse_mode
+    )
+    
+    if result["success"]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Successfully sent notification to chat_id: {request.chat_id}")
+        return ORJSONResponse(content={
+            "success": True,
+            "message": "Notification sent successfully",
+            "data": result
+        })
+    else:
+        logger.error(f"Failed to send notification to chat_id: {request.chat_id}")
+        logger.error(f"Error details: {result}")
+        return ORJSONResponse(status_code=400, content={"detail": result})
         
-        if result["success"]:
-            logger.info(f"Successfully sent notification to chat_id: {request.chat_id}")
-            return {
-                "success": True,
-                "message": "Notification sent successfully",
-                "data": result
-            }
-        else:
-            logger.error(f"Failed to send notification to chat_id: {request.chat_id}")
-            logger.error(f"Error details: {result}")
-            raise HTTPException(status_code=400, detail=result)
-            
-    except Exception as e:
-        logger.error(f"Error processing notification request: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.post("/webhook/notify-with-buttons")
-async def webhook_notify_with_buttons(request: NotificationWithButtonsRequest):
+@app.post("/webhook/notify-with-buttons", response_model=None, openapi_extra=json_body_openapi(NotificationWithButtonsRequest))
+async def webhook_notify_with_buttons(raw_request: Request):
     """Send a notification with inline keyboard buttons to a specific Telegram user"""
-    try:
-        logger.info(f"Received notification with buttons request for chat_id: {request.chat_id}")
-        
-        reply_markup = None
-        if request.buttons:
-            keyboard_buttons = []
-            for button in request.buttons:
-                keyboard_buttons.append(
-                    InlineKeyboardButton(
-                        text=button.get('text', 'Button'),
-                        callback_data=button.get('callback_data', 'default')
-                    )
-                )
-            reply_markup = InlineKeyboardMarkup(inline_keyboard=[keyboard_buttons])
-        
-        result = await send_notification(
-            chat_id=request.chat_id,
-            message=request.message,
-            reply_markup=reply_markup
-        )
+    request = await parse_json_body(raw_request, NotificationWithButtonsRequest)
+    
+    logger.info(f"Received notification with buttons request for chat_id: {request.chat_id}")
+    
+    reply_markup = None
+    if request.buttons:
+        reply_markup = build_buttons_markup(tuple(
+            (button.get('text', DEFAULT_BUTTON_TEXT), button.get('callback_data', DEFAULT_BUTTON_CALLBACK_DATA))
+            for button in request.buttons
+        ))
+    
+    result = await send_notification(
+        chat_id=request.chat_id,
+        message=request.message,
+        reply_markup=reply_markup
+    )
+    
+    if result["success"]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Successfully sent notification with buttons to chat_id: {request.chat_id}")
+        return ORJSONResponse(content={
+            "success": True,
+            "message": "Notification with buttons sent successfully",
+            "data": result
+        })
+    else:
+        logger.error(f"Failed to send notification with buttons to chat_id: {request.chat_id}")
+        return ORJSONResponse(status_code=400, content={"detail": result})
         
-        if result["success"]:
-            logger.info(f"Successfully sent notification with buttons to chat_id: {request.chat_id}")
-            return {
-                "success": True,
-                "message": "Notification with buttons sent successfully",
-                "data": result
-            }
-        else:
-            logger.error(f"Failed to send notification with buttons to chat_id: {request.chat_id}")
-            raise HTTPException(status_code=400, detail=result)
-            
-    except Exception as e:
-        logger.error(f"Error processing notification with buttons request: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.post("/webhook/bulk-notify")
-async def webhook_bulk_notify(request: BulkNotificationRequest):
-    """Send a notification to multiple Telegram users"""
-    try:
-        logger.info(f"Received bulk notification request for {len(request.chat_ids)} users")
-        
-        results = []
-        success_count = 0
-        
-        for chat_id in request.chat_ids:
+# Same encoding as ORJSONResponse, with the NDJSON line break appended by orjson itself
+NDJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+
+async def send_bulk_notification_one(
+    semaphore: asyncio.Semaphore,
+    chat_id: int,
+    request: BulkNotificationRequest
+) -> tuple:
+    """Send one chat's part of a bulk notification; unexpected errors become a failed result"""
+    async with semaphore:
+        try:
             result = await send_notification(
                 chat_id=chat_id,
                 message=request.message,
                 parse_mode=request.parse_mode
             )
-            results.append({"chat_id": chat_id, "result": result})
+        except Exception as e:
+            logger.error(f"Unexpected error in bulk notification to chat_id {chat_id}: {e}")
+            result = {"success": False, "error": "Internal server error", "details": str(e)}
+    return chat_id, result
+
+async def stream_bulk_notifications(request: BulkNotificationRequest):
+    """Send a bulk notification, yielding one NDJSON line per chat as it completes and a summary line last"""
+    semaphore = asyncio.Semaphore(BULK_NOTIFY_CONCURRENCY)
+    success_count = 0
+    tasks = [asyncio.create_task(send_bulk_notification_one(semaphore, chat_id, request)) for chat_id in request.chat_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            chat_id, result = await next_done
             if result["success"]:
                 success_count += 1
-        
-        logger.info(f"Bulk notification completed: {success_count}/{len(request.chat_ids)} successful")
-        
-        return {
-            "success": True,
-            "message": f"Bulk notification completed: {success_count}/{len(request.chat_ids)} successful",
-            "total_sent": success_count,
-            "total_requested": len(request.chat_ids),
-            "results": results
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing bulk notification request: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+            yield orjson.dumps({"chat_id": chat_id, "result": result}, option=NDJSON_OPTIONS)
+    finally:
+        # Cancel outstanding sends if the client disconnects mid-stream
+        for task in tasks:
+            task.cancel()
+    
+    logger.info(f"Bulk notification completed: {success_count}/{len(request.chat_ids)} successful")
+    yield orjson.dumps({
+        "success": True,
+        "message": f"Bulk notification completed: {success_count}/{len(request.chat_ids)} successful",
+        "total_sent": success_count,
+        "total_requested": len(request.chat_ids)
+    }, option=NDJSON_OPTIONS)
 
-@app.post("/webhook/raw")
-async def webhook_raw(request: dict):
+@app.post("/webhook/bulk-notify", response_model=None, openapi_extra=json_body_openapi(BulkNotificationRequest))
+async def webhook_bulk_notify(raw_request: Request, stream: bool = False):
+    """Send a notification to multiple Telegram users (with ?stream=true, results stream back as NDJSON)"""
+    request = await parse_json_body(raw_request, BulkNotificationRequest)
+    
+    if stream:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Streaming bulk notification to {len(request.chat_ids)} users")
+        return StreamingResponse(stream_bulk_notifications(request), media_type="application/x-ndjson")
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Received bulk notification request for {len(request.chat_ids)} users")
+    
+    # Send concurrently, but keep at most BULK_NOTIFY_CONCURRENCY requests in flight
+    semaphore = asyncio.Semaphore(BULK_NOTIFY_CONCURRENCY)
+    sent = await asyncio.gather(
+        *(send_bulk_notification_one(semaphore, chat_id, request) for chat_id in request.chat_ids)
+    )
+    
+    results = []
+    success_count = 0
+    for chat_id, result in sent:
+        results.append({"chat_id": chat_id, "result": result})
+        if result["success"]:
+            success_count += 1
+    
+    logger.info(f"Bulk notification completed: {success_count}/{len(request.chat_ids)} successful")
+    
+    return ORJSONResponse(content={
+        "success": True,
+        "message": f"Bulk notification completed: {success_count}/{len(request.chat_ids)} successful",
+        "total_sent": success_count,
+        "total_requested": len(request.chat_ids),
+        "results": results
+    })
+
+@app.post("/webhook/raw", response_model=None)
+async def webhook_raw(raw_request: Request):
     """Raw webhook endpoint that accepts any JSON payload for testing"""
+    # Decode the raw body once with orjson instead of having FastAPI parse and validate it as a dict field
     try:
-        logger.info(f"Received raw webhook request: {request}")
-        
-        # Extract chat_id and message from the request
-        chat_id = request.get("chat_id")
-        message = request.get("message", "Test notification from webhook")
-        
-        if not chat_id:
-            raise HTTPException(status_code=400, detail="chat_id is required")
-        
-        result = await send_notification(
-            chat_id=chat_id,
-            message=message
-        )
-        
-        return {
-            "success": result["success"],
-            "message": "Raw webhook processed",
-            "data": result,
-            "received_payload": request
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing raw webhook request: {e}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        request = orjson.loads(await raw_request.body())
+    except orjson.JSONDecodeError:
+        return ORJSONResponse(status_code=400, content={"detail": "Request body must be valid JSON"})
+    if not isinstance(request, dict):
+        return ORJSONResponse(status_code=400, content={"detail": "Request body must be a JSON object"})
+    
+    logger.info(f"Received raw webhook request for chat_id: {request.get('chat_id')}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Raw webhook payload: {request}")
+    
+    # Extract chat_id and message from the request
+    chat_id = request.get("chat_id")
+    message = request.get("message", DEFAULT_RAW_WEBHOOK_MESSAGE)
+    
+    if not chat_id:
+        return ORJSONResponse(status_code=400, content={"detail": "chat_id is required"})
+    
+    result = await send_notification(
+        chat_id=chat_id,
+        message=message
+    )
+    
+    return ORJSONResponse(content={
+        "success": result["success"],
+        "message": "Raw webhook processed",
+        "data": result,
+        "received_payload": request
+    })
 
 # Group Management Endpoints
-@app.post("/api/groups/register")
-async def register_group(request: GroupRegistrationRequest):
+@app.post("/api/groups/register", openapi_extra=json_body_openapi(GroupRegistrationRequest))
+async def register_group(raw_request: Request):
     """Register a group and fetch its metadata"""
+    request = await parse_json_body(raw_request, GroupRegistrationRequest)
+    
     try:
         logger.info(f"Received group registration request for group_id: {request.group_id}")
         
-        # Fetch group metadata from Telegram
+        # Fetch group metadata from Telegram (re-registration always gets fresh data)
+        invalidate_group_metadata(request.group_id)
         group_metadata = await fetch_group_metadata(request.group_id)
         
         # Apply custom topic names if provided
@@ -1282,8 +1369,6 @@ async def get_group_basic_info(group_id: int):
     try:
         logger.info(f"Fetching basic info for group_id: {group_id}")
         
-        from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-        
         # Get basic chat information only
         chat = await bot.get_chat(group_id)
         
@@ -1330,9 +1415,11 @@ async def get_group_basic_info(group_id: int):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 # Receipt Management Endpoints
-@app.post("/api/receipts")
-async def create_receipt(request: ReceiptRequest):
+@app.post("/api/receipts", openapi_extra=json_body_openapi(ReceiptRequest))
+async def create_receipt(raw_request: Request):
     """Create and send a receipt to a group topic"""
+    request = await parse_json_body(raw_request, ReceiptRequest)
+    
     try:
         logger.info(f"Received receipt creation request for group_id: {request.group_id}")
         logger.info(f"Customer: {request.customer_name}, Deal: ${request.price_deal}")
@@ -1349,8 +1436,7 @@ async def create_receipt(request: ReceiptRequest):
         
         # Get group type to determine if topic_id is needed
         try:
-            group_metadata = await fetch_group_metadata(request.group_id)
-            group_type = group_metadata.get("type", "unknown")
+            group_type = await fetch_group_type(request.group_id)
             
             # For channels, topic_id should be None
             if group_type == "channel" and request.topic_id is not None:
@@ -1411,20 +1497,21 @@ class TopicNamesUpdateRequest(BaseModel):
     """Request model for updating topic names"""
     topic_names: Dict[int, str] = Field(..., description="Mapping of topic IDs to their real names")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "topic_names": {
-                    1: "General",
-                    2: "Customer Support", 
-                    3: "Technical Issues"
-                }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "topic_names": {
+                1: "General",
+                2: "Customer Support", 
+                3: "Technical Issues"
             }
         }
+    })
 
-@app.post("/api/groups/{group_id}/topics/names")
-async def update_topic_names(group_id: int, request: TopicNamesUpdateRequest):
+@app.post("/api/groups/{group_id}/topics/names", openapi_extra=json_body_openapi(TopicNamesUpdateRequest))
+async def update_topic_names(group_id: int, raw_request: Request):
     """Update topic names for a group"""
+    request = await parse_json_body(raw_request, TopicNamesUpdateRequest)
+    
     try:
         logger.info(f"Updating topic names for group_id: {group_id}")
         logger.info(f"Topic names: {request.topic_names}")
@@ -1467,7 +1554,7 @@ async def get_group_topics(group_id: int):
     try:
         logger.info(f"Fetching topics for group_id: {group_id}")
         
-        # Fetch fresh group metadata which includes topic discovery
+        # Group metadata (including discovered topics), served from the short-lived metadata cache
         group_metadata = await fetch_group_metadata(group_id)
         
         return {
@@ -1486,6 +1573,10 @@ async def get_group_topics(group_id: int):
         logger.error(f"Error fetching group topics: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+# All routes are registered: build the OpenAPI schema now (FastAPI caches it on the app)
+# rather than on the first /docs or /openapi.json request
+if ENABLE_API_DOCS:
+    app.openapi()
 
 # Auto-registration handler for when bot is added to groups
 @dp.message(F.new_chat_members)
@@ -1520,6 +1611,7 @@ async def handle_new_chat_members(message: Message):
                 
                 # Fetch group metadata
                 try:
+                    invalidate_group_metadata(message.chat.id)
                     group_metadata = await fetch_group_metadata(message.chat.id)
                     
                     # Find an open topic for sending messages (if topics are enabled)
@@ -1605,6 +1697,16 @@ async def on_startup():
     print("API documentation at: http://localhost:3030/docs")
     print(f"Auto-registration endpoint: {config.AUTO_REGISTER_ENDPOINT}")
 
+@dp.shutdown()
+async def on_shutdown():
+    """Actions to run on bot shutdown"""
+    # Release pooled backend connections
+    await auth.close_http()
+    await seller_main.close_http()
+    await close_telegram_api_client()
+    await close_backend_client()
+    await close_telethon_client()
+
 async def run_bot():
     """Run the Telegram bot polling"""
     await dp.start_polling(bot)
@@ -1615,24 +1717,32 @@ async def run_webhook():
         app=app,
         host="0.0.0.0",
         port=3030,
-        log_level="info"
+        log_level="info",
+        # C HTTP parser (from uvicorn[standard]) instead of the pure-Python h11
+        http="httptools",
+        backlog=WEBHOOK_BACKLOG,
+        # Routes log their own summary line, so skip uvicorn's per-request access log
+        access_log=False
     )
     server = uvicorn.Server(config_uvicorn)
     await server.serve()
 
-async def main():
-    """Main function to run both bot and webhook server concurrently"""
-    print("Starting Telegram Bot with Webhook API...")
+async def main(with_webhook: bool = True):
+    """Main function to run the bot and (unless served by webhook_server.py) the webhook server concurrently"""
+    print("Starting Telegram Bot with Webhook API..." if with_webhook else "Starting Telegram Bot...")
     print("Bot will handle Telegram messages")
-    print("Webhook API will handle external notifications")
-    print("Press Ctrl+C to stop both services")
+    if with_webhook:
+        print("Webhook API will handle external notifications")
+    print("Press Ctrl+C to stop")
+    # Both services share this loop; log which implementation is active (uvloop or asyncio)
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
     
     try:
         # Run both services concurrently
-        await asyncio.gather(
-            run_bot(),
-            run_webhook()
-        )
+        services = [run_bot()]
+        if with_webhook:
+            services.append(run_webhook())
+        await asyncio.gather(*services)
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
@@ -1646,4 +1756,11 @@ async def main():
         logger.info("Shutdown complete")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is a faster drop-in event loop; fall back to asyncio's default where it isn't available
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    # --bot-only: the webhook API runs in its own worker processes (see webhook_server.py)
+    asyncio.run(main(with_webhook="--bot-only" not in sys.argv))
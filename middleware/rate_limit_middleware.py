@@ -0,0 +1,146 @@
+"""
+Rate Limit Middleware
+Keeps outgoing Bot API sends under Telegram's flood limits and retries on 429 and transient failures
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiohttp import ClientConnectorError
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows ~30 messages/s overall and 20 messages/min per group; stay a little below
+GLOBAL_RATE_PER_SECOND = 25
+GROUP_RATE_PER_MINUTE = 15
+
+# How many times a request is retried after a 429 (TelegramRetryAfter)
+MAX_RETRY_AFTER_ATTEMPTS = 3
+
+# Retries for network errors and Telegram 5xx responses, with exponential backoff plus jitter.
+# Methods that post something are only retried when the connection was never established
+MAX_TRANSIENT_ATTEMPTS = 3
+TRANSIENT_BASE_DELAY = 0.5
+TRANSIENT_MAX_DELAY = 15.0
+
+# Most groups with a bucket kept; least recently used ones are dropped first
+MAX_GROUP_BUCKETS = 1024
+
+# Bot API methods that post or change messages in a chat and count towards flood limits
+_THROTTLED_PREFIXES = ("send", "copy", "forward", "edit")
+
+# Methods that create a new message; repeating one after a timeout or 5xx can post it twice
+_NON_IDEMPOTENT_PREFIXES = ("send", "copy", "forward")
+
+def _is_safe_to_retry(method: TelegramMethod, error: Exception) -> bool:
+    """Whether a request that failed with a network/server error can be sent again"""
+    if not method.__api_method__.startswith(_NON_IDEMPOTENT_PREFIXES):
+        return True
+    # aiogram raises TelegramNetworkError while handling the aiohttp error, so it is the context;
+    # a failed connect means Telegram never saw the request, anything later might have been delivered
+    return isinstance(error, TelegramNetworkError) and isinstance(error.__context__, ClientConnectorError)
+
+# Set while probing topics: probe sends still share the global budget but must not use up
+# (or wait for) a group's 15/min message budget
+_group_limit_exempt: ContextVar[bool] = ContextVar("group_limit_exempt", default=False)
+
+@contextmanager
+def exempt_from_group_limit():
+    """Skip the per-group bucket for requests made inside this block (topic probes)"""
+    token = _group_limit_exempt.set(True)
+    try:
+        yield
+    finally:
+        _group_limit_exempt.reset(token)
+
+class TokenBucket:
+    """Async token bucket allowing `rate` acquisitions per `per` seconds"""
+
+    def __init__(self, rate: float, per: float = 1.0):
+        self.capacity = rate
+        self.tokens = rate
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        # Waiters queue on the lock and get tokens in arrival order, each sleeping only until
+        # its own token is due (instead of all waking together and racing for one token)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
+    def is_full(self) -> bool:
+        """True once the bucket has refilled completely, i.e. it behaves like a new one"""
+        return self.tokens + (time.monotonic() - self.updated) * self.fill_rate >= self.capacity
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Bot session middleware that throttles sends, honours Retry-After and retries transient failures"""
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(GLOBAL_RATE_PER_SECOND)
+        self.group_buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+
+    def _group_bucket(self, chat_id: int) -> TokenBucket:
+        """Per-group bucket, created on first use; refilled or least recently used buckets are dropped"""
+        bucket = self.group_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.group_buckets[chat_id] = TokenBucket(GROUP_RATE_PER_MINUTE, per=60.0)
+        self.group_buckets.move_to_end(chat_id)
+        while len(self.group_buckets) > 1:
+            oldest_id, oldest = next(iter(self.group_buckets.items()))
+            if len(self.group_buckets) <= MAX_GROUP_BUCKETS and not oldest.is_full():
+                break
+            del self.group_buckets[oldest_id]
+        return bucket
+
+    async def _throttle(self, method: TelegramMethod):
+        """Take tokens for a send: the global bucket plus the per-group bucket for groups"""
+        if not method.__api_method__.startswith(_THROTTLED_PREFIXES):
+            return
+        chat_id = getattr(method, "chat_id", None)
+        # Group and channel IDs are negative; private chats only share the global limit
+        if isinstance(chat_id, int) and chat_id < 0 and not _group_limit_exempt.get():
+            await self._group_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        retry_after_attempts = transient_attempts = 0
+        while True:
+            await self._throttle(method)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if retry_after_attempts == MAX_RETRY_AFTER_ATTEMPTS:
+                    raise
+                retry_after_attempts += 1
+                logger.warning(f"Flood limit on {method.__api_method__}, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                # Bad requests, forbidden chats etc. are not retried; only failures that may pass on their own
+                if transient_attempts == MAX_TRANSIENT_ATTEMPTS or not _is_safe_to_retry(method, e):
+                    raise
+                delay = min(TRANSIENT_BASE_DELAY * 2 ** transient_attempts + random.random(), TRANSIENT_MAX_DELAY)
+                transient_attempts += 1
+                logger.warning(f"{method.__api_method__} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
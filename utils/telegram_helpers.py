@@ -2,19 +2,52 @@
 Telegram Helper Functions
 Utilities for handling common Telegram operations safely
 """
+from collections import OrderedDict
+
 from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+
+# Fingerprint of the last content written to each (chat_id, message_id), so identical edits are skipped
+_MAX_TRACKED_MESSAGES = 4096
+_last_content: "OrderedDict[tuple[int, int], int]" = OrderedDict()
+
+def _content_fingerprint(text: str, reply_markup) -> int:
+    """Hash of the message text and its keyboard"""
+    markup_json = reply_markup.model_dump_json(exclude_none=True) if reply_markup is not None else None
+    return hash((text, markup_json))
+
+async def edit_if_changed(message: types.Message, text: str, reply_markup=None) -> bool:
+    """Edit a message only if its content changed; returns True if an edit was sent"""
+    key = (message.chat.id, message.message_id)
+    fingerprint = _content_fingerprint(text, reply_markup)
+    if _last_content.get(key) == fingerprint:
+        return False
+    
+    try:
+        await message.edit_text(text, reply_markup=reply_markup)
+        changed = True
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            _last_content.pop(key, None)
+            raise
+        changed = False
+    
+    _last_content[key] = fingerprint
+    _last_content.move_to_end(key)
+    if len(_last_content) > _MAX_TRACKED_MESSAGES:
+        _last_content.popitem(last=False)
+    return changed
 
 async def safe_edit_message(callback: types.CallbackQuery, text: str, reply_markup=None):
     """Safely edit a message, handling the 'message not modified' error"""
     try:
-        await callback.message.edit_text(text, reply_markup=reply_markup)
-        await callback.answer()
-    except Exception as e:
-        if "message is not modified" in str(e):
-            await callback.answer("🔄 بروزرسانی شد")
+        if await edit_if_changed(callback.message, text, reply_markup=reply_markup):
+            await callback.answer()
         else:
-            await callback.answer(f"خطا: {str(e)}", show_alert=True)
-            raise e
+            await callback.answer("🔄 بروزرسانی شد")
+    except Exception as e:
+        await callback.answer(f"خطا: {str(e)}", show_alert=True)
+        raise e
 
 async def safe_send_message(bot, chat_id: int, text: str, reply_markup=None):
     """Safely send a message with error handling"""
@@ -0,0 +1,33 @@
+"""
+Webhook API Server
+Serves the FastAPI app from main.py in its own uvicorn process(es) so webhook traffic
+doesn't share the bot's event loop. Run the bot separately with `python main.py --bot-only`;
+that process owns the Telethon session, so workers started here discover topics via the Bot API.
+"""
+import os
+
+import uvicorn
+
+import config
+
+# One worker unless config.py asks for more: each worker has its own flood limiter,
+# so N workers (plus the bot process) can send up to N + 1 times the per-process rate
+WEBHOOK_WORKERS = getattr(config, "WEBHOOK_WORKERS", 1)
+# Pending-connection queue shared by the workers (uvicorn's default is 2048)
+WEBHOOK_BACKLOG = getattr(config, "WEBHOOK_BACKLOG", 4096)
+
+if __name__ == "__main__":
+    # Inherited by the worker processes; main.py checks it to skip Telethon discovery
+    os.environ["WEBHOOK_SERVER_PROCESS"] = "1"
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=3030,
+        workers=WEBHOOK_WORKERS,
+        log_level="info",
+        # C HTTP parser (from uvicorn[standard]) instead of the pure-Python h11
+        http="httptools",
+        backlog=WEBHOOK_BACKLOG,
+        # Routes log their own summary line, so skip uvicorn's per-request access log
+        access_log=False
+    )